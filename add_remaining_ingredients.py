@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import csv
+from change_log import ChangeLog
 
 def add_remaining_ingredients():
     """添加剩余的食材到CSV文件"""
@@ -55,27 +55,10 @@ def add_remaining_ingredients():
         ["麦片", "mai pian", "食材", "谷物", "平", "甘", "脾;胃", "健脾益胃;润肠", "脾胃虚弱;便秘", "平和", "适量为宜", "——", "四季", "冲泡/煮粥", "牛奶;水果", "——", "30-50g/餐", "——", "燕麦制品，膳食纤维丰富，降脂降糖。", "现代营养学"]
     ]
     
-    # 读取现有CSV文件
+    # 追加到变更日志，不再整表重写；运行 change_log.py 合并进主表
     input_file = 'ingredients_master.csv'
-    rows = []
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        rows = list(reader)
-    
-    # 在最后的龙虾之前插入新数据
-    insert_position = len(rows) - 1  # 在最后一行(龙虾)之前插入
-    
     all_new_ingredients = nuts + bean_products + meat_eggs + grains
-    
-    # 插入新数据
-    for ingredient in reversed(all_new_ingredients):  # 反向插入以保持顺序
-        rows.insert(insert_position, ingredient)
-    
-    # 写回文件
-    with open(input_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+    ChangeLog(input_file).add_many(all_new_ingredients)
     
     print(f"成功添加 {len(all_new_ingredients)} 种食材:")
     print(f"- 坚果类: {len(nuts)} 种")
@@ -437,7 +437,7 @@ class DataManager {
      */
     normalizeFlavor(flavor) {
         if (!flavor) return '';
-        return flavor.split(/[,，、\s]+/).filter(f => f.trim()).join(',');
+        return flavor.split(/[,，、;；\s]+/).filter(f => f.trim()).join(',');
     }
 
     /**
@@ -493,7 +493,7 @@ class DataManager {
      */
     parseFlavors(flavors) {
         if (!flavors) return [];
-        return flavors.split(/[,，、\s]+/).filter(f => f.trim()).map(f => f.trim());
+        return flavors.split(/[,，、;；\s]+/).filter(f => f.trim()).map(f => f.trim());
     }
 
     /**
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+崩溃安全的文件写入
+- atomic_write: 先写同目录临时文件并刷盘，再 os.replace 原子替换目标文件，最后刷新目录项；
+  中途崩溃时目标文件要么是旧版本、要么是完整的新版本，不会留下写了一半的主表或索引
+- Checkpoint: 长时间批量任务的断点文件，每提交一批记录一次，重跑时从最后提交的批次之后继续
+"""
+
+import json
+import os
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def fsync_directory(directory):
+    """刷新目录项，保证 rename 本身落盘；不支持打开目录的平台（Windows）直接跳过"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8', newline=None, fsync=True):
+    """
+    用法与 open(path, mode) 相同；with 块正常结束才替换目标文件，异常时删除临时文件、保留原文件
+    已存在的目标文件保留原权限，新文件权限为 0644
+    """
+    if 'b' in mode:
+        encoding = newline = None
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, mode, encoding=encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if fsync:
+        fsync_directory(directory)
+
+
+def write_json(path, data, compact=False):
+    with atomic_write(path) as f:
+        if compact:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+class Checkpoint:
+    """
+    批量任务断点：记录任务标识（通常含输入文件的哈希）和最后提交的批次号
+    任务标识不一致（输入文件已变化）时视为新任务，从头开始
+    """
+
+    def __init__(self, path, job):
+        self.path = path
+        self.job = job
+        self.state = {'job': job, 'batch': -1, 'processed': 0, 'extra': {}}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                try:
+                    saved = json.load(f)
+                except json.JSONDecodeError:
+                    saved = {}
+            if saved.get('job') == job:
+                self.state.update(saved)
+
+    @property
+    def last_batch(self):
+        return self.state['batch']
+
+    @property
+    def processed(self):
+        return self.state['processed']
+
+    @property
+    def extra(self):
+        return self.state['extra']
+
+    def is_done(self, batch):
+        return batch <= self.state['batch']
+
+    def commit(self, batch, processed, **extra):
+        """批次处理完成并落盘后调用，原子写入新的断点"""
+        self.state.update(batch=batch, processed=processed, updated=time.time())
+        self.state['extra'].update(extra)
+        write_json(self.path, self.state)
+
+    def clear(self):
+        """任务全部完成后删除断点文件"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+供应商数据分批导入
+把供应商提供的食材CSV（列名与主表一致，可只含部分列）按批追加到主表的变更日志，
+每批写入并刷盘后更新断点文件；中断后重新运行会跳过已提交的批次，从下一批继续。
+每批追加日志前先把本批将要新增的名称记入断点（预写），某一批写入日志后、断点更新前崩溃时，
+重跑该批会把这些名称视为本批自己的新增而重新追加一次（变更日志按主键覆盖，结果不变），
+不会因为它们已出现在日志中而被误计为重复
+用法: python batch_ingest.py 供应商文件.csv [批大小]
+"""
+
+import hashlib
+import os
+import sys
+import time
+
+from atomic_io import Checkpoint
+from change_log import ChangeLog
+from data_model import read_csv_rows
+from ingredient_checker import IngredientChecker
+from text_normalize import normalize_key
+
+BATCH_SIZE = 500
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest(supplier_file, base_file='ingredients_master.csv', batch_size=BATCH_SIZE,
+           skip_existing=True, checkpoint_file=None):
+    """
+    分批导入 supplier_file，返回 (新增条数, 跳过条数)
+    skip_existing 为 True 时跳过主表中已存在的食材（按归一化名称及括号别名判断），只导入新食材
+    """
+    log = ChangeLog(base_file)
+    checkpoint_file = checkpoint_file or supplier_file + '.checkpoint.json'
+    job = f"{os.path.abspath(base_file)}:{file_digest(supplier_file)}:{batch_size}:{int(skip_existing)}"
+    checkpoint = Checkpoint(checkpoint_file, job)
+
+    header, rows = read_csv_rows(supplier_file)
+    if 'name_zh' not in header:
+        raise ValueError(f"{supplier_file} 缺少 name_zh 列")
+
+    if checkpoint.last_batch >= 0:
+        print(f"从断点继续：已提交 {checkpoint.last_batch + 1} 批，{checkpoint.processed} 行")
+    added = checkpoint.extra.get('added', 0)
+    skipped = checkpoint.extra.get('skipped', 0)
+    checker = IngredientChecker(base_file) if skip_existing else None
+    seen = set()
+
+    for batch_number, batch in enumerate(iter_batches(rows, batch_size)):
+        if checkpoint.is_done(batch_number):
+            continue
+        # 上次在本批写入日志后崩溃时，预写的名称是本批自己的新增，不算重复
+        replayed = set(checkpoint.extra.get('pending', [])) if batch_number == checkpoint.last_batch + 1 else set()
+        records = []
+        for row in batch:
+            record = dict(zip(header, row))
+            name = record['name_zh'].strip()
+            key = normalize_key(name)
+            if not name or key in seen:
+                skipped += 1
+                continue
+            if checker is not None and key not in replayed and checker.check_duplicate(name)[0]:
+                skipped += 1
+                continue
+            seen.add(key)
+            records.append(record)
+        if records:
+            checkpoint.commit(checkpoint.last_batch, checkpoint.processed,
+                              pending=[normalize_key(record['name_zh']) for record in records])
+            log.add_many(records)
+        added += len(records)
+        checkpoint.commit(batch_number, checkpoint.processed + len(batch), added=added, skipped=skipped, pending=[])
+        print(f"  第 {batch_number + 1} 批：导入 {len(records)} 条，累计 {added} 条")
+
+    checkpoint.clear()
+    log.maybe_compact()
+    return added, skipped
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python batch_ingest.py 供应商文件.csv [批大小]")
+        sys.exit(1)
+    supplier_file = sys.argv[1]
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else BATCH_SIZE
+
+    start = time.time()
+    added, skipped = ingest(supplier_file, batch_size=batch_size)
+    print(f"\n✅ 导入完成：新增 {added} 条，跳过重复 {skipped} 条，耗时 {time.time() - start:.1f} 秒")
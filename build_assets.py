@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建带内容指纹的静态资源目录 dist/
+- 从入口页面出发收集实际引用的 CSS/JS（含 CSS 中的 url()/@import）以及 JS 中加载的数据文件
+- CSS/JS 做保守压缩后按内容哈希命名（name.<哈希>.ext），页面和样式表中的引用改写为新文件名，
+  去掉手工维护的 ?v= 版本号
+- 每个文件旁写出 .gz（安装了 brotli 模块时另写 .br），供静态服务器直接返回预压缩版本
+- 生成 precache-manifest.json 和 Service Worker（sw.js）：带指纹的资源永久缓存，
+  数据文件按修订号预缓存，再次访问时直接从缓存读取、不再发请求验证；
+  入口页面同样按修订号预缓存，页面请求优先走网络，离线时退回缓存中的页面
+- 写出 _headers：/assets/* 为 immutable，页面、sw.js 和清单为 no-cache
+用法: python build_assets.py [输出目录]
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import time
+
+from atomic_io import atomic_write
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENTRY_PAGES = ['index.html', 'index_new.html', 'simple.html', '404.html']
+STATIC_PAGES_DIR = 'pages'
+DATA_DIR = 'data'
+# data/ 下只供构建脚本读取、不发布的文件（旧版本的搜索日志统计结果）
+UNPUBLISHED_DATA = {'search_boosts.json'}
+OUTPUT_DIR = 'dist'
+ASSETS_DIR = 'assets'
+
+HASH_LENGTH = 10
+COMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.json', '.csv', '.svg')
+
+HTML_REF = re.compile(r'''(<(?:script|link)\b[^>]*?\b(?:src|href)=)(["'])([^"']+)\2''', re.I)
+CSS_REF = re.compile(r'''(url\(\s*|@import\s+)(["']?)([^"')\s;]+)\2''', re.I)
+CSS_STRING = re.compile(r'''("(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')''')
+JS_STRING = re.compile(r'''(["'])([^"'\s]+\.(?:csv|json))\1''')
+
+
+def is_local(url):
+    return not re.match(r'^(?:[a-z][a-z0-9+.-]*:|//|#)', url, re.I)
+
+
+def strip_query(url):
+    return re.split(r'[?#]', url, 1)[0]
+
+
+def resolve(url, base_file, root):
+    """页面或样式表中的引用 -> 相对 root 的路径（posix 形式）；以 / 开头的按站点根目录解析"""
+    path = strip_query(url)
+    if path.startswith('/'):
+        return posixpath.normpath(path.lstrip('/'))
+    base_dir = posixpath.dirname(os.path.relpath(base_file, root).replace(os.sep, '/'))
+    return posixpath.normpath(posixpath.join(base_dir, path))
+
+
+def minify_css(text):
+    """去注释、压缩空白；字符串字面量原样保留，不改动冒号两侧，避免破坏选择器里的伪类"""
+    parts = CSS_STRING.split(re.sub(r'/\*.*?\*/', '', text, flags=re.S))
+    for i in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[i])
+        parts[i] = re.sub(r'\s*([{};,>])\s*', r'\1', part).replace(';}', '}')
+    return ''.join(parts).strip() + '\n'
+
+
+def minify_js(text):
+    """
+    按行的保守压缩：去掉空行、整行注释和行首缩进。
+    模板字符串内部（反引号未闭合时）原样保留，行尾不合并，不依赖分号自动插入的行为
+    """
+    lines = []
+    in_template = False
+    in_comment = False
+    for line in text.splitlines():
+        if in_template:
+            lines.append(line)
+            in_template = line.count('`') % 2 == 0
+            continue
+        stripped = line.strip()
+        if in_comment:
+            if '*/' not in stripped:
+                continue
+            stripped = stripped.split('*/', 1)[1].strip()
+            in_comment = False
+        elif stripped.startswith('/*'):
+            if '*/' not in stripped[2:]:
+                in_comment = True
+                continue
+            stripped = stripped[2:].split('*/', 1)[1].strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+        in_template = stripped.count('`') % 2 == 1
+    return '\n'.join(lines) + '\n'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprint(path, digest):
+    stem, ext = posixpath.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+class AssetBuilder:
+    """按依赖顺序处理资源：被引用的文件先生成指纹，引用方改写后再计算自身指纹"""
+
+    def __init__(self, root='.', output_dir=OUTPUT_DIR):
+        self.root = root
+        self.output_dir = output_dir
+        self.assets = {}      # 源路径 -> 带指纹的路径
+        self.data_files = {}  # 数据文件路径 -> 修订号
+        self.pages = {}       # 页面路径 -> 修订号
+
+    def read(self, path):
+        with open(os.path.join(self.root, path), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def exists(self, path):
+        return os.path.isfile(os.path.join(self.root, path))
+
+    def emit(self, path, data):
+        target = os.path.join(self.output_dir, path)
+        with atomic_write(target, 'wb') as f:
+            f.write(data)
+        if path.endswith(COMPRESS_EXTENSIONS):
+            with atomic_write(target + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with atomic_write(target + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+
+    def relative(self, target, source):
+        """source 文件中指向 target 的相对引用，部署到子路径（GitHub Pages）时同样有效"""
+        return posixpath.relpath(target, posixpath.dirname(source) or '.')
+
+    def scan_data(self, text, source):
+        """JS 中以字符串字面量出现、且确实存在的本地 .csv/.json 文件（fetch 相对页面解析）"""
+        for _, url in JS_STRING.findall(text):
+            if not is_local(url):
+                continue
+            path = strip_query(url).lstrip('/') if url.startswith('/') else posixpath.normpath(strip_query(url))
+            if self.exists(path):
+                self.add_data(path)
+
+    def add_data(self, path):
+        if path in self.data_files:
+            return
+        with open(os.path.join(self.root, path), 'rb') as f:
+            data = f.read()
+        self.data_files[path] = content_hash(data)
+        self.emit(path, data)
+
+    def build_asset(self, path, stack=()):
+        """处理单个 CSS/JS 资源，返回带指纹的路径"""
+        if path in self.assets:
+            return self.assets[path]
+        if path in stack:
+            raise ValueError(f"资源循环引用: {' -> '.join(stack + (path,))}")
+        text = self.read(path)
+        if path.endswith('.css'):
+            def replace(match):
+                prefix, quote, url = match.groups()
+                if not is_local(url) or url.startswith('data:'):
+                    return match.group(0)
+                target = resolve(url, os.path.join(self.root, path), self.root)
+                if not self.exists(target):
+                    return match.group(0)
+                if target.endswith(('.css', '.js')):
+                    built = self.build_asset(target, stack + (path,))
+                else:
+                    built = self.build_binary(target)
+                return f"{prefix}{quote}{self.relative(built, path)}{quote}"
+            text = minify_css(CSS_REF.sub(replace, text))
+        elif path.endswith('.js'):
+            self.scan_data(text, path)
+            text = minify_js(text)
+        data = text.encode('utf-8')
+        built = fingerprint(path, content_hash(data))
+        self.emit(built, data)
+        self.assets[path] = built
+        return built
+
+    def build_binary(self, path):
+        """CSS 引用的图片、字体等按原样复制并加指纹"""
+        if path not in self.assets:
+            with open(os.path.join(self.root, path), 'rb') as f:
+                data = f.read()
+            built = fingerprint(path, content_hash(data))
+            self.emit(built, data)
+            self.assets[path] = built
+        return self.assets[path]
+
+    def build_page(self, page):
+        """改写页面中的本地 CSS/JS 引用，并在 </body> 前注入 Service Worker 注册脚本，返回页面修订号"""
+        text = self.read(page)
+
+        def replace(match):
+            prefix, quote, url = match.groups()
+            if not is_local(url):
+                return match.group(0)
+            target = resolve(url, os.path.join(self.root, page), self.root)
+            if not target.endswith(('.css', '.js')) or not self.exists(target):
+                return match.group(0)
+            return f"{prefix}{quote}{self.relative(self.build_asset(target), page)}{quote}"
+
+        text = HTML_REF.sub(replace, text)
+        sw_url = self.relative('sw.js', page)
+        registration = SW_REGISTRATION.format(url=sw_url, scope=self.relative('.', page) + '/')
+        if '</body>' in text:
+            text = text.replace('</body>', registration + '</body>', 1)
+        else:
+            text += registration
+        data = text.encode('utf-8')
+        self.pages[page] = content_hash(data)
+        self.emit(page, data)
+        return self.pages[page]
+
+
+SW_REGISTRATION = """    <script>
+        if ('serviceWorker' in navigator) {{
+            window.addEventListener('load', function () {{
+                navigator.serviceWorker.register('{url}', {{ scope: '{scope}' }});
+            }});
+        }}
+    </script>
+"""
+
+SERVICE_WORKER = """// 由 build_assets.py 生成，请勿手工修改
+const CACHE_NAME = 'shiliao-precache-%(version)s';
+const PRECACHE = %(urls)s;
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(PRECACHE.map(url => new Request(url, { cache: 'reload' }))))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith('shiliao-precache-') && key !== CACHE_NAME)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET' || new URL(request.url).origin !== self.location.origin) {
+        return;
+    }
+    if (request.mode === 'navigate') {
+        // 页面优先走网络以便及时拿到新版本的资源引用；离线时退回预缓存的入口页面，目录地址对应其中的 index.html
+        const path = new URL(request.url).pathname;
+        event.respondWith(
+            fetch(request).catch(() => caches.match(request, { ignoreSearch: true })
+                .then(cached => cached || (path.endsWith('/')
+                    ? caches.match(path + 'index.html', { ignoreSearch: true })
+                    : undefined)))
+        );
+        return;
+    }
+    // 带指纹的资源和按修订号预缓存的数据文件：命中缓存即直接返回，不再发请求验证
+    event.respondWith(
+        caches.match(request, { ignoreSearch: true })
+            .then(cached => cached || fetch(request))
+    );
+});
+"""
+
+HEADERS = """/assets/*
+  Cache-Control: public, max-age=31536000, immutable
+
+/sw.js
+  Cache-Control: no-cache
+
+/precache-manifest.json
+  Cache-Control: no-cache
+
+/*.html
+  Cache-Control: no-cache
+
+/
+  Cache-Control: no-cache
+"""
+
+
+def collect_pages(root='.'):
+    pages = [page for page in ENTRY_PAGES if os.path.isfile(os.path.join(root, page))]
+    pattern = os.path.join(root, STATIC_PAGES_DIR, '**', '*.html')
+    pages += sorted(os.path.relpath(path, root).replace(os.sep, '/') for path in glob.glob(pattern, recursive=True))
+    return pages
+
+
+def build_assets(root='.', output_dir=OUTPUT_DIR):
+    """构建 dist/，返回预缓存清单"""
+    if os.path.isdir(os.path.join(output_dir, ASSETS_DIR)):
+        # 旧指纹文件不再被引用，整体清掉，避免目录无限增长
+        shutil.rmtree(os.path.join(output_dir, ASSETS_DIR))
+    builder = AssetBuilder(root, output_dir)
+    pages = collect_pages(root)
+    for page in pages:
+        builder.build_page(page)
+    for path in sorted(glob.glob(os.path.join(root, DATA_DIR, '*.json'))):
+        if os.path.basename(path) in UNPUBLISHED_DATA:
+            continue
+        builder.add_data(os.path.relpath(path, root).replace(os.sep, '/'))
+
+    entries = [{'url': built, 'revision': None} for built in sorted(set(builder.assets.values()))]
+    entries += [{'url': path, 'revision': revision} for path, revision in sorted(builder.data_files.items())]
+    # 入口页面不带指纹，按修订号预缓存，离线打开时 Service Worker 才有页面可退回；静态详情页数量多，不预缓存
+    entries += [{'url': page, 'revision': builder.pages[page]} for page in ENTRY_PAGES if page in builder.pages]
+    version = content_hash(json.dumps(entries, sort_keys=True).encode('utf-8'))
+    manifest = {'version': version, 'entries': entries}
+
+    with atomic_write(os.path.join(output_dir, 'precache-manifest.json')) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    # 数据文件和页面的 URL 不变，附上修订号作为查询参数，内容变化时会被重新下载；命中时 ignoreSearch
+    urls = [entry['url'] if entry['revision'] is None else f"{entry['url']}?rev={entry['revision']}"
+            for entry in entries]
+    with atomic_write(os.path.join(output_dir, 'sw.js')) as f:
+        f.write(SERVICE_WORKER % {'version': version, 'urls': json.dumps(urls, ensure_ascii=False, indent=4)})
+    with atomic_write(os.path.join(output_dir, '_headers')) as f:
+        f.write(HEADERS)
+    return manifest, builder, pages
+
+
+if __name__ == "__main__":
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else OUTPUT_DIR
+    print("开始构建静态资源...")
+    print("=" * 50)
+    start = time.time()
+    manifest, builder, pages = build_assets(output_dir=output_dir)
+
+    source_size = sum(os.path.getsize(path) for path in builder.assets)
+    built_size = sum(os.path.getsize(os.path.join(output_dir, path)) for path in builder.assets.values())
+    gzip_size = sum(os.path.getsize(os.path.join(output_dir, path + '.gz'))
+                    for path in builder.assets.values() if path.endswith(COMPRESS_EXTENSIONS))
+    print(f"页面: {len(pages)}，资源: {len(builder.assets)}，数据文件: {len(builder.data_files)}")
+    print(f"资源体积: {source_size / 1024:.1f} KB -> 压缩 {built_size / 1024:.1f} KB -> gzip {gzip_size / 1024:.1f} KB")
+    if brotli is None:
+        print("未安装 brotli 模块，仅生成 .gz")
+    print(f"预缓存清单版本: {manifest['version']}，共 {len(manifest['entries'])} 项")
+    print(f"输出目录: {output_dir}（耗时 {time.time() - start:.2f} 秒）")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预计算仪表盘图表的多维计数立方体
+对 charts.js 的图表维度（分类、四气、五味、体质、季节），在 searchEngine.js 可用的筛选条件
+（类型、分类、子类、四气、五味、体质、季节）下预先计算分组计数，
+任意带筛选条件的图表都只需按单元格键直接取值，不再在浏览器端遍历全部食材
+取值整理、图表计数和筛选规则均与 dataManager.js / searchEngine.js 相同，
+切片结果等于应用中按同样条件筛选后的列表统计（tests/test_chart_cube.py 在真实数据上比对两者）
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from itertools import combinations, product
+
+from atomic_io import atomic_write
+from data_model import PLACEHOLDERS, read_csv_dicts
+
+# 与 config.js 的 dataProcessing.transforms.constitutionMapping 一致
+CONSTITUTION_MAPPING = {
+    '气虚质': '气虚', '阳虚质': '阳虚', '阴虚质': '阴虚', '痰湿质': '痰湿', '湿热质': '湿热',
+    '血虚质': '血虚', '气郁质': '气郁', '血瘀质': '血瘀', '平和质': '平和',
+}
+# dataManager.normalizeQi 只保留这五个取值，其余（如 "微温"、"温、寒"）视为空
+VALID_QI = ('寒', '凉', '平', '温', '热')
+
+# 维度名 -> (食材字段, 菜谱字段, 多值分隔符, 筛选规则)
+# 字段为 None 表示该类记录没有此维度，分隔符为 None 表示整个字段是一个取值
+# 分隔符与 dataManager.js 的 normalize*/parse* 一致；筛选规则与 searchEngine.applyFilters 一致：
+# 'exact' 为整值相等，'contains' 为字段包含筛选值（忽略大小写）
+DIMENSIONS = {
+    'kind': (None, None, None, 'exact'),
+    'gate_category': ('gate_category', None, None, 'exact'),
+    'subcategory': ('subcategory', None, None, 'exact'),
+    'four_qi': ('four_qi', None, None, 'exact'),
+    'five_flavors': ('five_flavors', None, r'[,，、;；\s]+', 'contains'),
+    'constitutions': ('constitutions_suitable', 'constitution_tags', r'[,，、\s/]+', 'contains'),
+    'seasons': ('seasonality', 'seasonality', r'[,，、\s]+', 'contains'),
+}
+# processIngredients 为空的分类/子类填入的默认值
+DEFAULT_VALUES = {'gate_category': '未分类', 'subcategory': '未分类'}
+
+# 图表展示的目标维度（对应 dataManager.stats 的 categories/qi/flavors/constitutions/seasons）
+CHART_TARGETS = ('gate_category', 'four_qi', 'five_flavors', 'constitutions', 'seasons')
+# 可作为筛选条件的维度（对应 searchEngine.applyFilters 的 type/category/subcategory/qi/flavor/constitution/season）
+FILTER_DIMENSIONS = ('kind', 'gate_category', 'subcategory', 'four_qi', 'five_flavors', 'constitutions', 'seasons')
+# applyFilters 只对食材检查的条件，菜谱总能通过；菜谱在这些维度上记为通配编码
+INGREDIENT_ONLY_FILTERS = ('gate_category', 'subcategory', 'four_qi', 'five_flavors')
+WILDCARD = '*'
+
+# 每个图表最多预计算的筛选维度数
+MAX_FILTERS = 2
+
+
+def normalize_field(dim, value):
+    """按 dataManager.processIngredients/processRecipes 整理字段文本（CSV 取值已去除首尾空白）"""
+    value = value.strip()
+    if dim == 'four_qi':
+        return value if value in VALID_QI else ''
+    if dim == 'constitutions':
+        for source, target in CONSTITUTION_MAPPING.items():
+            value = value.replace(source, target)
+    pattern = DIMENSIONS[dim][2]
+    if pattern is not None:
+        return ','.join(v for v in re.split(pattern, value) if v.strip())
+    return value or DEFAULT_VALUES.get(dim, '')
+
+
+def chart_values(dim, text):
+    """图表计数用的取值，与 dataManager.buildStatistics 一致"""
+    pattern = DIMENSIONS[dim][2]
+    values = [text] if pattern is None else [v.strip() for v in re.split(pattern, text)]
+    return sorted({v for v in values if v not in PLACEHOLDERS})
+
+
+def item_dimension_values(ingredients, recipes):
+    """
+    把每条食材/菜谱展开为 {维度: 整理后的字段文本}，没有该维度的记录不含此键
+    图表取值由 chart_values 拆分，筛选时按 DIMENSIONS 的规则与整段文本比较
+    """
+    items = []
+    for kind, rows, column in (('食材', ingredients, 0), ('配方', recipes, 1)):
+        for row in rows:
+            fields = {'kind': kind}
+            for dim, spec in DIMENSIONS.items():
+                if spec[column] is not None:
+                    fields[dim] = normalize_field(dim, row.get(spec[column]) or '')
+            items.append(fields)
+    return items
+
+
+def filter_codes(dim, fields, codes):
+    """记录在筛选维度上能通过的取值编码；菜谱不受只针对食材的条件限制，记为通配编码"""
+    if dim not in fields:
+        return [WILDCARD] if dim in INGREDIENT_ONLY_FILTERS else []
+    text = fields[dim]
+    if DIMENSIONS[dim][3] == 'exact':
+        return [codes[dim][text]] if text in codes[dim] else []
+    text = text.lower()
+    return [code for value, code in codes[dim].items() if value.lower() in text]
+
+
+def cuboid_names(max_filters=MAX_FILTERS):
+    """图表目标维度 × 至多 max_filters 个筛选维度的组合，名称为 "目标|筛选1|筛选2"，筛选维度按 FILTER_DIMENSIONS 顺序"""
+    names = []
+    for target in CHART_TARGETS:
+        for size in range(max_filters + 1):
+            for filters in combinations(FILTER_DIMENSIONS, size):
+                names.append('|'.join((target,) + filters))
+    return names
+
+
+def cell_key(codes):
+    return ','.join(map(str, codes))
+
+
+def build_cube(items, max_filters=MAX_FILTERS):
+    """
+    为 cuboid_names 给出的组合计算分组计数，单元格以取值编码拼成的键存储，切片时直接查找
+    目标维度按图表取值计数，筛选维度记录能通过的筛选值，一条记录对其取值组合各计一次
+    """
+    dim_names = list(DIMENSIONS)
+    dictionaries = {dim: Counter() for dim in dim_names}
+    item_values = []
+    for fields in items:
+        values = {dim: chart_values(dim, text) for dim, text in fields.items()}
+        for dim, dim_values in values.items():
+            dictionaries[dim].update(dim_values)
+        item_values.append(values)
+    # 按出现频次编码，常见取值编码更小
+    codes = {dim: {value: code for code, (value, _) in enumerate(counter.most_common())}
+             for dim, counter in dictionaries.items()}
+    item_filters = [{dim: filter_codes(dim, fields, codes) for dim in FILTER_DIMENSIONS} for fields in items]
+
+    cuboids = {}
+    for name in cuboid_names(max_filters):
+        target, *filters = name.split('|')
+        counts = Counter()
+        for values, passes in zip(item_values, item_filters):
+            code_lists = [[codes[target][v] for v in values.get(target, [])]] + [passes[dim] for dim in filters]
+            if all(code_lists):
+                counts.update(product(*code_lists))
+        if counts:
+            cuboids[name] = {cell_key(cell): count for cell, count in sorted(counts.items(), key=str)}
+
+    return {
+        'dimensions': {dim: [value for value, _ in dictionaries[dim].most_common()] for dim in dim_names},
+        'cuboids': cuboids,
+        'maxFilters': max_filters,
+        'ingredientOnlyFilters': list(INGREDIENT_ONLY_FILTERS),
+        'wildcard': WILDCARD,
+        'totals': {
+            'totalIngredients': sum(1 for fields in items if fields['kind'] == '食材'),
+            'totalRecipes': sum(1 for fields in items if fields['kind'] == '配方'),
+            'totalCategories': len(dictionaries['gate_category'])
+        }
+    }
+
+
+def slice_cube(cube, target, filters=None):
+    """
+    取目标维度在筛选条件下的计数 {取值: 数量}，与应用中按同样条件筛选后的列表统计一致
+    target 须为 CHART_TARGETS 之一；filters 为 {维度: 取值}，维度须在 FILTER_DIMENSIONS 中，个数不超过 maxFilters
+    只针对食材的条件同时查找通配编码（菜谱），按单元格键直接查找，不扫描整个组合
+    """
+    filters = filters or {}
+    if target not in CHART_TARGETS:
+        raise ValueError(f"不支持的图表维度: {target}")
+    unknown = [dim for dim in filters if dim not in FILTER_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"不支持的筛选维度: {', '.join(unknown)}")
+    if len(filters) > cube['maxFilters']:
+        raise ValueError(f"最多支持 {cube['maxFilters']} 个筛选维度")
+    dims = [dim for dim in FILTER_DIMENSIONS if dim in filters]
+    cells = cube['cuboids'].get('|'.join([target] + dims), {})
+    dictionaries = cube['dimensions']
+    options = []
+    for dim in dims:
+        dim_options = [dictionaries[dim].index(filters[dim])] if filters[dim] in dictionaries[dim] else []
+        if dim in cube['ingredientOnlyFilters']:
+            dim_options.append(cube['wildcard'])
+        if not dim_options:
+            return {}
+        options.append(dim_options)
+
+    result = {}
+    for code, value in enumerate(dictionaries[target]):
+        count = sum(cells.get(cell_key((code,) + combo), 0) for combo in product(*options))
+        if count:
+            result[value] = count
+    return result
+
+
+def build_chart_cube(ingredients_file='ingredients_master.csv',
+                     recipes_file='recipes_master.csv',
+                     output_file=os.path.join('data', 'chart_cube.json')):
+    """构建图表计数立方体并保存"""
+    ingredients = read_csv_dicts(ingredients_file)
+    recipes = read_csv_dicts(recipes_file)
+    items = item_dimension_values(ingredients, recipes)
+    cube = build_cube(items)
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    with atomic_write(output_file) as f:
+        json.dump(cube, f, ensure_ascii=False, separators=(',', ':'))
+
+    cell_count = sum(len(cells) for cells in cube['cuboids'].values())
+    print(f"记录数: {len(items)}（食材 {cube['totals']['totalIngredients']}，菜谱 {cube['totals']['totalRecipes']}）")
+    print(f"维度组合: {len(cube['cuboids'])} 个，非零单元格: {cell_count} 个")
+    print(f"立方体已保存到: {output_file} ({os.path.getsize(output_file)} 字节)")
+    return cube
+
+
+if __name__ == "__main__":
+    print("开始预计算图表计数立方体...")
+    print("=" * 50)
+    cube = build_chart_cube()
+
+    print("\n切片示例:")
+    print(f"  四气分布: {slice_cube(cube, 'four_qi')}")
+    print(f"  中药材的四气分布: {slice_cube(cube, 'four_qi', {'gate_category': '中药材'})}")
+    print(f"  夏季、温性的分类分布: {slice_cube(cube, 'gate_category', {'seasons': '夏', 'four_qi': '温'})}")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建搜索自动补全索引
+把食材名称、别名、拼音、功效关键词和菜谱功效标签插入前缀树，
+每个节点预先缓存按权重排序的前 K 个候选，查询只需沿输入前缀走到对应节点，
+耗时只与前缀长度有关，与数据库规模无关
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter
+
+from atomic_io import atomic_write
+from data_model import PLACEHOLDERS, load_ingredients, load_recipe_ingredients, load_recipes
+from pinyin import pinyin_keys, split_readings
+from text_normalize import normalize_key
+
+TOP_K = 10
+
+# 功效关键词与 searchEngine.js 中 getSuggestions 的切分规则保持一致
+KEYWORD_SPLIT = re.compile(r'[,，、;；\s]+')
+
+# 搜索日志次数对权重的放大系数
+SEARCH_LOG_WEIGHT = 2.0
+
+
+class CompletionTrie:
+    """每个节点缓存前 K 个候选的前缀树"""
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.entries = []      # [{'text', 'type', 'category', 'weight'}]
+        self.children = [{}]   # 节点编号 -> {字符: 子节点编号}
+        self.top = [[]]        # 节点编号 -> 候选编号列表（按权重降序）
+
+    def add_entry(self, text, entry_type, category, weight):
+        self.entries.append({'text': text, 'type': entry_type, 'category': category, 'weight': weight})
+        return len(self.entries) - 1
+
+    def insert(self, key, entry_id):
+        """把候选挂到 key 路径上的每个节点，并维护各节点的前 K 名"""
+        weight = self.entries[entry_id]['weight']
+        node = 0
+        for char in key:
+            child = self.children[node].get(char)
+            if child is None:
+                child = len(self.children)
+                self.children[node][char] = child
+                self.children.append({})
+                self.top.append([])
+            node = child
+            top = self.top[node]
+            if entry_id in top:
+                continue
+            if len(top) < self.top_k or weight > self.entries[top[-1]]['weight']:
+                top.append(entry_id)
+                top.sort(key=lambda i: (-self.entries[i]['weight'], i))
+                del top[self.top_k:]
+
+    def suggest(self, prefix, limit=TOP_K):
+        node = 0
+        for char in normalize_key(prefix):
+            node = self.children[node].get(char)
+            if node is None:
+                return []
+        return [self.entries[i] for i in self.top[node][:limit]]
+
+    def to_json(self):
+        return {
+            'topK': self.top_k,
+            'entries': [[e['text'], e['type'], e['category'], round(e['weight'], 3)] for e in self.entries],
+            'children': self.children,
+            'top': self.top
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        trie = cls(data['topK'])
+        trie.entries = [{'text': t, 'type': ty, 'category': c, 'weight': w} for t, ty, c, w in data['entries']]
+        trie.children = data['children']
+        trie.top = data['top']
+        return trie
+
+
+def name_aliases(name_zh):
+    """拆出主名称和括号内别名，如 '米仁(薏苡仁)' -> ['米仁', '薏苡仁']"""
+    aliases = []
+    if '(' in name_zh:
+        aliases.append(name_zh.split('(')[0].strip())
+        if ')' in name_zh:
+            aliases.append(name_zh.split('(')[1].split(')')[0].strip())
+    return [alias for alias in aliases if alias and alias != name_zh]
+
+
+def load_search_counts(search_counts_file):
+    """读取搜索日志统计出的权重（search_log_analytics 生成的 boosts），文件不存在时返回空"""
+    if not search_counts_file or not os.path.exists(search_counts_file):
+        return {}
+    with open(search_counts_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('boosts', data)
+
+
+def name_keys(key, index_suffixes):
+    """中文名称的检索键：key 为已归一化的名称，返回整体前缀以及可选的各个后缀（支持从名称中间开始输入）"""
+    if not index_suffixes:
+        return [key]
+    return [key[i:] for i in range(len(key)) if not KEYWORD_SPLIT.match(key[i])]
+
+
+def build_completion_index(ingredients_file='ingredients_master.csv',
+                           recipes_file='recipes_master.csv',
+                           recipe_ingredients_file='recipe_ingredients_master.csv',
+                           search_counts_file=os.path.join('.cache', 'search_boosts.json'),
+                           output_file=os.path.join('data', 'completion_index.json'),
+                           top_k=TOP_K, index_suffixes=True):
+    """构建带流行度权重的自动补全前缀树并保存"""
+    ingredients = load_ingredients(ingredients_file)
+    recipes = load_recipes(recipes_file)
+    recipe_ingredients = load_recipe_ingredients(recipe_ingredients_file)
+    search_counts = load_search_counts(search_counts_file)
+
+    # 食材在菜谱中的使用频次，按加载时生成的名称键统计，括号备注按主名称归并
+    usage = Counter()
+    for name, key in zip(recipe_ingredients.column('ingredient_name_zh'),
+                         recipe_ingredients.key_column('ingredient_name_zh')):
+        usage[key] += 1
+        if '(' in name:
+            usage[normalize_key(name.split('(')[0])] += 1
+
+    def weight(text, base):
+        # 对数压缩，避免个别高频食材/检索词垄断所有前缀
+        return math.log1p(base) + SEARCH_LOG_WEIGHT * math.log1p(search_counts.get(text, 0))
+
+    trie = CompletionTrie(top_k)
+    seen = set()
+
+    for record, name_key in zip(ingredients, ingredients.key_column('name_zh')):
+        name = record.name_zh
+        if name_key in seen:
+            continue
+        seen.add(name_key)
+        alias_keys = [normalize_key(alias) for alias in name_aliases(name)]
+        count = usage[name_key] + sum(usage[key] for key in alias_keys)
+        entry_id = trie.add_entry(name, 'ingredient', '食材', weight(name, 1 + count))
+        for key in name_keys(name_key, index_suffixes):
+            trie.insert(key, entry_id)
+        for alias_key in alias_keys:
+            for key in name_keys(alias_key, index_suffixes):
+                trie.insert(key, entry_id)
+        for reading in split_readings(record.name_pinyin):
+            for key in pinyin_keys(reading):
+                trie.insert(normalize_key(key), entry_id)
+
+    for record, title_key in zip(recipes, recipes.key_column('title_zh')):
+        if title_key in seen:
+            continue
+        seen.add(title_key)
+        entry_id = trie.add_entry(record.title_zh, 'recipe', '配方', weight(record.title_zh, 1))
+        for key in name_keys(title_key, index_suffixes):
+            trie.insert(key, entry_id)
+
+    # 功效关键词按覆盖的食材数加权
+    function_counts = Counter()
+    for functions in ingredients.column('primary_functions'):
+        for keyword in KEYWORD_SPLIT.split(functions):
+            if keyword not in PLACEHOLDERS:
+                function_counts[keyword] += 1
+    for keyword, count in function_counts.items():
+        entry_id = trie.add_entry(keyword, 'function', '功效', weight(keyword, count))
+        trie.insert(normalize_key(keyword), entry_id)
+
+    # 菜谱功效标签，去掉 "(现代)" 之类的来源标注
+    intent_counts = Counter()
+    for intent_tags in recipes.column('intent_tags'):
+        for tag in KEYWORD_SPLIT.split(intent_tags):
+            tag = tag.split('(')[0].strip()
+            if tag:
+                intent_counts[tag] += 1
+    for tag, count in intent_counts.items():
+        if tag in function_counts:
+            continue
+        entry_id = trie.add_entry(tag, 'intent', '功效', weight(tag, count))
+        trie.insert(normalize_key(tag), entry_id)
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    with atomic_write(output_file) as f:
+        json.dump(trie.to_json(), f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"候选条目: {len(trie.entries)}，前缀树节点: {len(trie.children)}")
+    print(f"其中功效关键词 {len(function_counts)} 个，功效标签 {len(intent_counts)} 个")
+    if search_counts:
+        print(f"已合并搜索日志权重 {len(search_counts)} 条")
+    print(f"索引已保存到: {output_file}")
+    return trie
+
+
+if __name__ == "__main__":
+    print("开始构建自动补全索引...")
+    print("=" * 50)
+    trie = build_completion_index()
+
+    print("\n补全示例:")
+    for prefix in ['山', '生姜', 'sq', '健脾', '南瓜']:
+        suggestions = trie.suggest(prefix, limit=5)
+        print(f"  {prefix}: {', '.join(s['text'] for s in suggestions) or '无候选'}")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建拼音检索索引
+把食材的 name_pinyin 展开为全拼（san qi）、连写拼音（sanqi）和首字母（sq）三种检索键，
+存成有序数组以支持前缀二分查找；菜谱没有拼音字段，按食材拼音学到的单字读音自动补全
+"""
+
+import bisect
+import json
+import os
+import re
+from collections import Counter, defaultdict
+
+from atomic_io import atomic_write
+from data_model import read_csv_dicts
+from pinyin import pinyin_keys, split_readings
+from text_normalize import normalize_text
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+CJK_PATTERN = re.compile(r'[一-鿿]')
+TOKEN_PATTERN = re.compile(r'[一-鿿]|[A-Za-z0-9]+')
+
+# 菜谱名称常用、但食材名称中未出现的字，作为学习结果之外的补充读音
+EXTRA_CHAR_PINYIN = {
+    '扁': 'bian', '祛': 'qu', '湿': 'shi', '润': 'run', '消': 'xiao', '化': 'hua', '腻': 'ni',
+    '宁': 'ning', '补': 'bu', '藜': 'li', '能': 'neng', '量': 'liang', '碗': 'wan', '温': 'wen',
+    '养': 'yang', '蒸': 'zheng', '腱': 'jian', '暖': 'nuan', '身': 'shen', '滋': 'zi', '葫': 'hu',
+    '炒': 'chao', '汉': 'han', '杯': 'bei', '目': 'mu', '菲': 'fei', '尔': 'er', '排': 'pai',
+    '腩': 'nan', '饭': 'fan', '盅': 'zhong', '胸': 'xiong', '鹰': 'ying', '嘴': 'zui', '脊': 'ji',
+    '蔬': 'shu', '日': 'ri', '秋': 'qiu', '枇': 'pi', '杷': 'pa', '令': 'ling', '滞': 'zhi',
+    '须': 'xu', '利': 'li', '家': 'jia', '常': 'chang', '煲': 'bao', '彩': 'cai', '快': 'kuai',
+    '佛': 'fo', '手': 'shou', '安': 'an', '肠': 'chang', '蹄': 'ti', '疏': 'shu', '解': 'jie',
+    '太': 'tai', '内': 'nei', '酯': 'zhi', '早': 'zao', '餐': 'can', '蝎': 'xie', '锅': 'guo',
+    '裙': 'qun', '吐': 'tu', '司': 'si', '汤': 'tang', '粥': 'zhou', '饮': 'yin', '羹': 'geng',
+    '炖': 'dun', '煮': 'zhu', '拌': 'ban', '焖': 'men', '烧': 'shao', '烤': 'kao', '煎': 'jian',
+    '汁': 'zhi', '糕': 'gao', '饼': 'bing', '面': 'mian', '卷': 'juan', '沙': 'sha', '拉': 'la',
+}
+
+
+def learn_char_pinyin(ingredients):
+    """从食材名称与拼音的逐字对应关系中学习单字读音，多音字取出现次数最多的读音"""
+    votes = defaultdict(Counter)
+    for row in ingredients:
+        chars = CJK_PATTERN.findall(row['name_zh'].split('(')[0])
+        for reading in split_readings(row.get('name_pinyin', '')):
+            syllables = reading.split()
+            if chars and len(chars) == len(syllables):
+                for char, syllable in zip(chars, syllables):
+                    votes[char][syllable] += 1
+    char_pinyin = dict(EXTRA_CHAR_PINYIN)
+    char_pinyin.update((char, counter.most_common(1)[0][0]) for char, counter in votes.items())
+    return char_pinyin
+
+
+def generate_pinyin(text, char_pinyin):
+    """为没有拼音的名称生成拼音，无法确定读音时返回 None"""
+    syllables = []
+    for token in TOKEN_PATTERN.findall(text):
+        if not CJK_PATTERN.match(token):
+            syllables.append(token.lower())
+        elif token in char_pinyin:
+            syllables.append(char_pinyin[token])
+        elif lazy_pinyin is not None:
+            syllables.append(lazy_pinyin(token)[0].replace('ü', 'v'))
+        else:
+            return None
+    return ' '.join(syllables) if syllables else None
+
+
+def fill_recipe_pinyin(recipes, char_pinyin):
+    """为菜谱补全拼音，返回 {菜谱名称: 拼音} 和无法补全的菜谱列表"""
+    filled, missing = {}, []
+    for row in recipes:
+        title = row['title_zh'].strip()
+        pinyin = generate_pinyin(title, char_pinyin)
+        if pinyin:
+            filled[title] = pinyin
+        else:
+            missing.append(title)
+    return filled, missing
+
+
+def normalize_query(query):
+    """输入法全角字母（ｓａｎｑｉ）先折叠为半角"""
+    return normalize_text(query).lower().replace('ü', 'v')
+
+
+class PinyinIndex:
+    """有序数组形式的拼音前缀索引"""
+
+    def __init__(self, items, keys, refs):
+        self.items = items
+        self.keys = keys
+        self.refs = refs
+
+    @classmethod
+    def build(cls, items):
+        """items 为 [{'name', 'type', 'pinyin'}]，拼音可含多个分号分隔的读音"""
+        pairs = set()
+        for item_id, item in enumerate(items):
+            for reading in split_readings(item['pinyin']):
+                for key in pinyin_keys(reading):
+                    pairs.add((key, item_id))
+        pairs = sorted(pairs)
+        return cls(items, [key for key, _ in pairs], [item_id for _, item_id in pairs])
+
+    @classmethod
+    def load(cls, index_file):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['items'], data['keys'], data['refs'])
+
+    def save(self, index_file):
+        with atomic_write(index_file) as f:
+            json.dump({'items': self.items, 'keys': self.keys, 'refs': self.refs},
+                      f, ensure_ascii=False, separators=(',', ':'))
+
+    def search(self, query, limit=10):
+        """前缀查询，按匹配键长度（越短越贴近输入）排序返回条目"""
+        prefix = normalize_query(query)
+        if not prefix:
+            return []
+        matches = {}
+        position = bisect.bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            item_id = self.refs[position]
+            key_length = len(self.keys[position])
+            if item_id not in matches or key_length < matches[item_id]:
+                matches[item_id] = key_length
+            position += 1
+        ranked = sorted(matches, key=lambda item_id: (matches[item_id], item_id))
+        return [self.items[item_id] for item_id in ranked[:limit]]
+
+
+def build_pinyin_index(ingredients_file='ingredients_master.csv',
+                       recipes_file='recipes_master.csv',
+                       output_file=os.path.join('data', 'pinyin_index.json')):
+    """构建食材和菜谱的拼音索引并保存"""
+    ingredients = read_csv_dicts(ingredients_file)
+    recipes = read_csv_dicts(recipes_file)
+
+    char_pinyin = learn_char_pinyin(ingredients)
+    print(f"可用单字读音 {len(char_pinyin)} 个")
+
+    items = []
+    seen = set()
+    for row in ingredients:
+        name = row['name_zh'].strip()
+        if name in seen:
+            continue
+        seen.add(name)
+        pinyin = row.get('name_pinyin', '').strip() or generate_pinyin(name, char_pinyin)
+        if pinyin:
+            items.append({'name': name, 'type': 'ingredient', 'pinyin': pinyin})
+
+    recipe_pinyin, missing = fill_recipe_pinyin(recipes, char_pinyin)
+    for title, pinyin in recipe_pinyin.items():
+        items.append({'name': title, 'type': 'recipe', 'pinyin': pinyin})
+
+    print(f"菜谱拼音补全: {len(recipe_pinyin)} 个成功，{len(missing)} 个含未知读音")
+    if missing:
+        print(f"  未补全示例: {', '.join(missing[:5])}")
+
+    index = PinyinIndex.build(items)
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    index.save(output_file)
+    print(f"索引条目: {len(items)}，检索键: {len(index.keys)}")
+    print(f"索引已保存到: {output_file}")
+    return index
+
+
+if __name__ == "__main__":
+    print("开始构建拼音检索索引...")
+    print("=" * 50)
+    index = build_pinyin_index()
+
+    print("\n查询示例:")
+    for query in ['sanqi', 'san q', 'sq', 'ds', 'shan yao']:
+        results = index.search(query, limit=5)
+        names = ', '.join(f"{item['name']}({item['pinyin']})" for item in results)
+        print(f"  {query}: {names or '无匹配'}")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+主表变更日志
+新增/修改/删除记录时只向 <主表>.changes.jsonl 追加一行，不再整表读入后重写；
+读取时把日志叠加到主表上得到最新数据，compact() 再把日志合并成新的主表并原子替换。
+写入在文件锁保护下进行，多个录入脚本可以同时追加而不会互相覆盖；读取持有共享锁，
+不会读到合并到一半的主表和日志。
+主键按归一化后的名称比较，全角括号、繁体字写法不同的同一食材不会重复入库
+"""
+
+import codecs
+import csv
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from atomic_io import atomic_write
+from data_model import read_csv_rows
+from text_normalize import normalize_key, normalize_text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 日志条数超过该值时 maybe_compact() 才会真正合并
+COMPACT_THRESHOLD = 200
+
+
+@contextmanager
+def file_lock(lock_path, shared=False):
+    """跨进程文件锁，shared=True 为共享锁（Windows 下不支持共享锁，退化为排他锁）"""
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def line_terminator(path):
+    """文件首行使用的换行符，保证合并后整表不会因换行符变化而在 git 中全部改动"""
+    with open(path, 'rb') as f:
+        first = f.readline()
+    return '\n' if first.endswith(b'\n') and not first.endswith(b'\r\n') else '\r\n'
+
+
+def has_bom(path):
+    """文件是否以 UTF-8 BOM 开头，合并时原样保留，避免其他工具按不同编码读取"""
+    with open(path, 'rb') as f:
+        return f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8
+
+
+def ends_with_newline(path):
+    """日志是否以换行结尾；崩溃留下的半行没有换行，接着追加会把新记录也拼坏"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    except (FileNotFoundError, OSError):
+        # 文件不存在或为空
+        return True
+
+
+class ChangeLog:
+    """以 key_field（默认 name_zh）为主键的追加式变更日志"""
+
+    def __init__(self, base_file='ingredients_master.csv', log_file=None, key_field='name_zh'):
+        self.base_file = base_file
+        self.log_file = log_file or base_file + '.changes.jsonl'
+        self.lock_file = self.log_file + '.lock'
+        self.key_field = key_field
+        self.header = self.read_header()
+
+    def read_header(self):
+        with open(self.base_file, 'r', encoding='utf-8-sig') as f:
+            return next(csv.reader(f))
+
+    def to_row(self, record):
+        """列表按标题顺序补齐，字典按字段名取值"""
+        if isinstance(record, dict):
+            return [str(record.get(field, '')) for field in self.header]
+        record = [str(value) for value in record]
+        return (record + [''] * len(self.header))[:len(self.header)]
+
+    def append(self, entries):
+        """在锁内一次性追加多条日志并刷盘；日志末尾是崩溃留下的半行时先补换行，把半行隔离成单独一行"""
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        with file_lock(self.lock_file):
+            if not ends_with_newline(self.log_file):
+                lines = '\n' + lines
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        return len(entries)
+
+    def add_many(self, records):
+        """新增记录；主键已存在时整行覆盖"""
+        entries = []
+        for record in records:
+            row = self.to_row(record)
+            # 入库时主键字段统一为半角、简体写法
+            key_index = self.header.index(self.key_field)
+            row[key_index] = normalize_text(row[key_index])
+            key = normalize_key(row[key_index])
+            entries.append({'op': 'add', 'key': key, 'row': row, 'ts': time.time()})
+        return self.append(entries)
+
+    def add(self, record):
+        return self.add_many([record])
+
+    def update(self, key, fields):
+        """修改部分字段"""
+        unknown = set(fields) - set(self.header)
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+        return self.append([{'op': 'update', 'key': normalize_key(key), 'fields': fields, 'ts': time.time()}])
+
+    def delete(self, key):
+        return self.append([{'op': 'delete', 'key': normalize_key(key), 'ts': time.time()}])
+
+    def read_entries(self):
+        if not os.path.exists(self.log_file):
+            return []
+        entries = []
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 进程中途崩溃可能留下半行，忽略即可
+                    continue
+        return entries
+
+    def read(self):
+        """
+        主表叠加日志后的最新数据，返回 OrderedDict{归一化主键: 行}
+        主表和日志在同一把共享锁内读取，并发的 compact() 不会让读到的主表是旧的、日志却已清空
+        """
+        with file_lock(self.lock_file, shared=True):
+            return self._read()
+
+    def _read(self):
+        key_index = self.header.index(self.key_field)
+        records = OrderedDict()
+        _, rows = read_csv_rows(self.base_file)
+        for row in rows:
+            records[normalize_key(row[key_index])] = row
+
+        for entry in self.read_entries():
+            key = normalize_key(entry['key'])
+            if entry['op'] == 'add':
+                records[key] = entry['row']
+            elif entry['op'] == 'update' and key in records:
+                row = list(records[key])
+                for field, value in entry['fields'].items():
+                    row[self.header.index(field)] = value
+                records[key] = row
+            elif entry['op'] == 'delete':
+                records.pop(key, None)
+        return records
+
+    def iter_rows(self):
+        return iter(self.read().values())
+
+    def pending(self):
+        return len(self.read_entries())
+
+    def compact(self):
+        """
+        把日志合并进主表：写入同目录临时文件、刷盘后原子替换主表，再清空日志
+        替换后、清空前如果崩溃，重放日志结果不变（各操作均为幂等）
+        """
+        with file_lock(self.lock_file):
+            entries = self.read_entries()
+            if not entries:
+                return 0
+            records = self._read()
+            terminator = line_terminator(self.base_file)
+            encoding = 'utf-8-sig' if has_bom(self.base_file) else 'utf-8'
+            with atomic_write(self.base_file, encoding=encoding, newline='') as f:
+                writer = csv.writer(f, lineterminator=terminator)
+                writer.writerow(self.header)
+                writer.writerows(records.values())
+            with atomic_write(self.log_file):
+                pass
+            return len(entries)
+
+    def maybe_compact(self, threshold=COMPACT_THRESHOLD):
+        if self.pending() >= threshold:
+            return self.compact()
+        return 0
+
+    def start_background_compaction(self, interval=60, threshold=COMPACT_THRESHOLD):
+        """启动后台线程定期合并，返回用于停止线程的 Event"""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.maybe_compact(threshold)
+
+        threading.Thread(target=run, name='change-log-compactor', daemon=True).start()
+        return stop
+
+
+if __name__ == "__main__":
+    log = ChangeLog()
+    pending = log.pending()
+    print(f"主表: {log.base_file}")
+    print(f"待合并日志: {pending} 条")
+    if pending:
+        merged = log.compact()
+        print(f"✅ 已合并 {merged} 条日志，当前记录数: {len(log.read())}")
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑的内存数据模型
+按列存储（struct-of-arrays）食材、菜谱和菜谱配料数据：
+- 重复出现的文本（如 "《本草纲目》要点/现代药理参考"、"适量为宜"、"——"）在加载时去重共享，只保留一份字符串对象
+- 取值有限的分类字段以整数编码存入 array，每行只占 2 字节
+- 按行访问时返回 __slots__ 记录对象，不为每行创建字典
+- 名称类字段在加载时一次性生成归一化键列（全角/繁体/异体字折叠），去重、关联和检索直接使用
+多个工作进程各自加载数据时，单进程内存占用远小于逐行字典或 pandas object 列
+"""
+
+import csv
+import heapq
+import json
+import os
+import re
+import sys
+import tempfile
+from array import array
+from operator import itemgetter
+
+from text_normalize import normalize_key
+
+INGREDIENT_FIELDS = (
+    'name_zh', 'name_pinyin', 'gate_category', 'subcategory', 'four_qi', 'five_flavors',
+    'meridians', 'primary_functions', 'indications', 'constitutions_suitable',
+    'constitutions_caution', 'contraindications', 'seasonality', 'prep_methods',
+    'pairing_good', 'pairing_bad', 'dietary_dosage', 'medicinal_dosage', 'modern_notes', 'source_ref'
+)
+
+RECIPE_FIELDS = (
+    'title_zh', 'intent_tags', 'constitution_tags', 'method', 'usage', 'cautions', 'seasonality', 'source_ref'
+)
+
+RECIPE_INGREDIENT_FIELDS = ('recipe_title', 'ingredient_name_zh', 'amount', 'note')
+
+# 整数编码的分类字段
+INGREDIENT_CATEGORICALS = (
+    'gate_category', 'subcategory', 'four_qi', 'five_flavors', 'meridians',
+    'seasonality', 'dietary_dosage', 'medicinal_dosage', 'source_ref'
+)
+RECIPE_CATEGORICALS = ('constitution_tags', 'seasonality', 'source_ref')
+RECIPE_INGREDIENT_CATEGORICALS = ('amount', 'note')
+
+# 加载时生成归一化键列的字段
+INGREDIENT_KEY_FIELDS = ('name_zh',)
+RECIPE_KEY_FIELDS = ('title_zh',)
+RECIPE_INGREDIENT_KEY_FIELDS = ('recipe_title', 'ingredient_name_zh')
+
+# 表示“无数据”的占位取值，剖析、合并和图表统计统一按空值处理
+PLACEHOLDERS = {'', '——', '—', '-', '--', 'N/A', 'n/a', 'null', 'None'}
+# 列表型字段（归经、配伍等）的分隔符，不含行文中的逗号
+LIST_SPLIT = re.compile(r'[;；、/]+')
+
+# external_sort 每段在内存中排序的行数，超过时分段写入临时文件
+SORT_CHUNK_ROWS = 50000
+
+
+class _Record:
+    """__slots__ 记录基类，按字段顺序初始化"""
+    __slots__ = ()
+
+    def __init__(self, values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({getattr(self, self.__slots__[0])!r})"
+
+
+class IngredientRecord(_Record):
+    __slots__ = INGREDIENT_FIELDS
+
+
+class RecipeRecord(_Record):
+    __slots__ = RECIPE_FIELDS
+
+
+class RecipeIngredientRecord(_Record):
+    __slots__ = RECIPE_INGREDIENT_FIELDS
+
+
+class Categorical:
+    """分类字段的取值字典：取值 <-> 整数编码"""
+    __slots__ = ('values', 'codes')
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Table:
+    """按列存储的数据表"""
+
+    def __init__(self, fields, categoricals, record_class, key_fields=()):
+        self.fields = fields
+        self.record_class = record_class
+        self.categories = {field: Categorical() for field in categoricals}
+        self.columns = {field: array('H') if field in self.categories else [] for field in fields}
+        self.key_columns = {field: [] for field in key_fields}
+        self._key_cache = {}
+        self._indexes = {}
+
+    def append(self, values):
+        for field, value in zip(self.fields, values):
+            keys = self.key_columns.get(field)
+            if keys is not None:
+                key = self._key_cache.get(value)
+                if key is None:
+                    key = normalize_key(value)
+                    # 已是归一化形式的取值直接共享原字符串
+                    key = self._key_cache[value] = value if key == value else key
+                keys.append(key)
+            category = self.categories.get(field)
+            if category is None:
+                self.columns[field].append(value)
+                continue
+            code = category.encode(value)
+            column = self.columns[field]
+            if code > 0xFFFF and column.typecode == 'H':
+                column = self.columns[field] = array('I', column)
+            column.append(code)
+        self._indexes.clear()
+
+    def __len__(self):
+        return len(self.columns[self.fields[0]])
+
+    def get(self, i, field):
+        """读取单个字段，分类字段自动解码"""
+        value = self.columns[field][i]
+        category = self.categories.get(field)
+        return category.values[value] if category is not None else value
+
+    def row(self, i):
+        return self.record_class([self.get(i, field) for field in self.fields])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def column(self, field):
+        """整列取值（分类字段解码为字符串）"""
+        category = self.categories.get(field)
+        if category is None:
+            return self.columns[field]
+        return [category.values[code] for code in self.columns[field]]
+
+    def codes(self, field):
+        """分类字段的整数编码列，可直接用于计数或向量化运算"""
+        return self.columns[field]
+
+    def index_by(self, field):
+        """按字段建立 {取值: [行号]} 索引，结果会缓存到下次追加数据为止"""
+        index = self._indexes.get(field)
+        if index is None:
+            index = {}
+            for i, value in enumerate(self.column(field)):
+                index.setdefault(value, []).append(i)
+            self._indexes[field] = index
+        return index
+
+    def find(self, field, value):
+        return [self.row(i) for i in self.index_by(field).get(value, [])]
+
+    def key_column(self, field):
+        """字段的归一化键列，与数据行一一对应"""
+        return self.key_columns[field]
+
+    def find_key(self, field, text):
+        """按归一化键查找，'紅棗'、'红枣 ' 都能找到 '红枣'"""
+        cache_key = ('key', field)
+        index = self._indexes.get(cache_key)
+        if index is None:
+            index = {}
+            for i, key in enumerate(self.key_columns[field]):
+                index.setdefault(key, []).append(i)
+            self._indexes[cache_key] = index
+        return [self.row(i) for i in index.get(normalize_key(text), [])]
+
+
+def read_csv_rows(csv_file):
+    """
+    逐行读取CSV，返回 (标题, 行迭代器)
+    兼容 utf-8-sig、跳过空行和拼接文件残留的标题行，并把短行补齐到标题长度
+    """
+    f = open(csv_file, 'r', encoding='utf-8-sig', newline='')
+    reader = csv.reader(f)
+    header = [field.lstrip('\ufeff').strip() for field in next(reader)]
+
+    def rows():
+        with f:
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue
+                if row[0].lstrip('\ufeff').strip() == header[0]:
+                    continue
+                if len(row) != len(header):
+                    row = (row + [''] * len(header))[:len(header)]
+                yield row
+
+    return header, rows()
+
+
+def read_csv_dicts(csv_file):
+    """按 read_csv_rows 的规则读取整个CSV为字典列表，供一次性加载全表的构建脚本使用"""
+    header, rows = read_csv_rows(csv_file)
+    return [dict(zip(header, row)) for row in rows]
+
+
+def _spill(chunk, tmp_dir):
+    chunk.sort(key=itemgetter(0, 1))
+    fd, path = tempfile.mkstemp(suffix='.jsonl', dir=tmp_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for item in chunk:
+            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    chunk.clear()
+    return path
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            key, seq, row = json.loads(line)
+            yield key, seq, row
+
+
+def external_sort(rows, key, chunk_rows=SORT_CHUNK_ROWS, tmp_dir=None):
+    """
+    按 key(行) 稳定排序，产出 (键, 原始行号, 行)；键和行需可 JSON 序列化
+    行数不超过 chunk_rows 时直接在内存中排序；否则每段排序后写入临时文件（tmp_dir 为 None 时自建临时目录），
+    再用 heapq.merge 做 k 路归并，内存中最多保留一段
+    """
+    runs = []
+    chunk = []
+    owned = None
+    try:
+        for seq, row in enumerate(rows):
+            chunk.append((key(row), seq, row))
+            if len(chunk) >= chunk_rows:
+                if tmp_dir is None:
+                    owned = tempfile.TemporaryDirectory(prefix='sort-')
+                    tmp_dir = owned.name
+                runs.append(_spill(chunk, tmp_dir))
+        if not runs:
+            chunk.sort(key=itemgetter(0, 1))
+            yield from chunk
+            return
+        if chunk:
+            runs.append(_spill(chunk, tmp_dir))
+        yield from heapq.merge(*(_read_run(path) for path in runs), key=itemgetter(0, 1))
+    finally:
+        if owned is not None:
+            owned.cleanup()
+
+
+def load_table(csv_file, fields, categoricals, record_class, key_fields=()):
+    """把CSV加载为按列存储的表，文本值在加载过程中去重共享，key_fields 同时生成归一化键列"""
+    header, rows = read_csv_rows(csv_file)
+    positions = [header.index(field) if field in header else None for field in fields]
+    table = Table(fields, categoricals, record_class, key_fields)
+    pool = {}
+    for row in rows:
+        values = []
+        for position in positions:
+            value = row[position].strip() if position is not None else ''
+            values.append(pool.setdefault(value, value))
+        table.append(values)
+    # 加载完成后不再需要键的查重缓存
+    table._key_cache.clear()
+    return table
+
+
+def load_ingredients(csv_file='ingredients_master.csv'):
+    return load_table(csv_file, INGREDIENT_FIELDS, INGREDIENT_CATEGORICALS, IngredientRecord,
+                      INGREDIENT_KEY_FIELDS)
+
+
+def load_recipes(csv_file='recipes_master.csv'):
+    return load_table(csv_file, RECIPE_FIELDS, RECIPE_CATEGORICALS, RecipeRecord, RECIPE_KEY_FIELDS)
+
+
+def load_recipe_ingredients(csv_file='recipe_ingredients_master.csv'):
+    return load_table(csv_file, RECIPE_INGREDIENT_FIELDS, RECIPE_INGREDIENT_CATEGORICALS, RecipeIngredientRecord,
+                      RECIPE_INGREDIENT_KEY_FIELDS)
+
+
+def deep_size(obj, seen=None):
+    """粗略估算对象及其引用对象的总内存（共享对象只计一次）"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, (Table, Categorical)):
+        size += deep_size(obj.__dict__ if hasattr(obj, '__dict__') else
+                          [getattr(obj, slot) for slot in obj.__slots__], seen)
+    return size
+
+
+if __name__ == "__main__":
+    print("紧凑数据模型内存对比")
+    print("=" * 50)
+    for label, csv_file, loader in (
+        ('食材', 'ingredients_master.csv', load_ingredients),
+        ('菜谱', 'recipes_master.csv', load_recipes),
+        ('菜谱配料', 'recipe_ingredients_master.csv', load_recipe_ingredients),
+    ):
+        table = loader(csv_file)
+        with open(csv_file, 'r', encoding='utf-8-sig') as f:
+            dict_rows = list(csv.DictReader(f))
+        print(f"{label}: {len(table)} 行，文件 {os.path.getsize(csv_file) // 1024} KB")
+        print(f"  字典列表: {deep_size(dict_rows) // 1024} KB")
+        print(f"  按列存储: {deep_size(table) // 1024} KB")
+        for field, category in table.categories.items():
+            print(f"    {field}: {len(category)} 个取值")
@@ -4,6 +4,9 @@
 import csv
 from collections import OrderedDict
 
+from atomic_io import atomic_write
+from text_normalize import normalize_key
+
 def deduplicate_csv():
     """去除CSV文件中的重复记录，保留最后出现的版本（通常是更完整的数据）"""
     
@@ -11,6 +14,7 @@ def deduplicate_csv():
     output_file = 'ingredients_master_clean.csv'
     
     # 读取数据，使用OrderedDict保持顺序，但只保留每个name_zh的最后一个版本
+    # 以归一化后的名称为键，全角括号、繁体字写法不同的同名记录也视为重复
     records = OrderedDict()
     header = None
     
@@ -20,15 +24,15 @@ def deduplicate_csv():
         
         for row in reader:
             if row and len(row) >= 1:  # 确保行不为空且有name_zh字段
-                name_zh = row[0].strip()
-                records[name_zh] = row  # 后面的会覆盖前面的
+                name_key = normalize_key(row[0])
+                records[name_key] = row  # 后面的会覆盖前面的
     
     # 写入清理后的数据
-    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+    with atomic_write(output_file, newline='') as f:
         writer = csv.writer(f)
         writer.writerow(header)  # 写入标题行
         
-        for name_zh, row in records.items():
+        for name_key, row in records.items():
             writer.writerow(row)
     
     print(f"原始记录数（不含标题）: {len(records) + (381 - len(records) - 1)}")
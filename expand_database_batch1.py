@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import csv
+from change_log import ChangeLog
 
 def expand_database():
     """大幅扩展食材数据库，补充各类缺失的食材"""
@@ -56,27 +56,10 @@ def expand_database():
         ["酸奶酪", "suan nai lao", "食材", "乳品", "凉", "甘;酸", "脾;胃", "健脾助消化", "脾胃虚弱;消化不良", "平和", "适量为宜", "脾胃虚寒慎", "四季", "直食", "蜂蜜;坚果", "——", "100-150g/次", "——", "发酵奶制品，酸甜可口。", "现代营养学"]
     ]
     
-    # 读取现有CSV文件
+    # 追加到变更日志，不再整表重写；运行 change_log.py 合并进主表
     input_file = 'ingredients_master.csv'
-    rows = []
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        rows = list(reader)
-    
-    # 在最后一行之前插入新数据
-    insert_position = len(rows) - 1
-    
     all_new_ingredients = mushrooms + dairy_products
-    
-    # 插入新数据
-    for ingredient in reversed(all_new_ingredients):  # 反向插入以保持顺序
-        rows.insert(insert_position, ingredient)
-    
-    # 写回文件
-    with open(input_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+    ChangeLog(input_file).add_many(all_new_ingredients)
     
     print(f"第一批扩展完成，成功添加 {len(all_new_ingredients)} 种食材:")
     print(f"- 菌菇类: {len(mushrooms)} 种")
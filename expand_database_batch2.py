@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import csv
+from change_log import ChangeLog
 
 def expand_database_batch2():
     """第二批数据库扩展 - 茶类和糖类食材"""
@@ -49,27 +49,10 @@ def expand_database_batch2():
         ["赤藓糖醇", "chi xian tang chun", "食材", "糖类", "平", "甘", "脾", "健脾", "脾虚", "平和", "适量为宜", "——", "四季", "调味", "——", "——", "10-20g/次", "——", "天然代糖，口感接近蔗糖，几乎不被吸收。", "现代营养学"]
     ]
     
-    # 读取现有CSV文件
+    # 追加到变更日志，不再整表重写；运行 change_log.py 合并进主表
     input_file = 'ingredients_master.csv'
-    rows = []
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        rows = list(reader)
-    
-    # 在最后一行之前插入新数据
-    insert_position = len(rows) - 1
-    
     all_new_ingredients = teas + sugars
-    
-    # 插入新数据
-    for ingredient in reversed(all_new_ingredients):  # 反向插入以保持顺序
-        rows.insert(insert_position, ingredient)
-    
-    # 写回文件
-    with open(input_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+    ChangeLog(input_file).add_many(all_new_ingredients)
     
     print(f"第二批扩展完成，成功添加 {len(all_new_ingredients)} 种食材:")
     print(f"- 茶类: {len(teas)} 种")
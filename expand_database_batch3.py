@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import csv
+from change_log import ChangeLog
 
 def expand_database_batch3():
     """第三批数据库扩展 - 补充蔬菜、水果、调料"""
@@ -83,27 +83,10 @@ def expand_database_batch3():
         ["芥末", "jie mo", "食材", "调料", "热", "辛", "肺;胃", "温肺化痰;开胃", "寒痰;食欲不振", "阳虚", "少量使用", "阴虚火旺禁", "四季", "调味/蘸料", "生鱼片;凉菜", "——", "1-2g/餐", "——", "日式调料，杀菌力强，刺激性大。", "《本草纲目》/现代营养学"]
     ]
     
-    # 读取现有CSV文件
+    # 追加到变更日志，不再整表重写；运行 change_log.py 合并进主表
     input_file = 'ingredients_master.csv'
-    rows = []
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        rows = list(reader)
-    
-    # 在最后一行之前插入新数据
-    insert_position = len(rows) - 1
-    
     all_new_ingredients = additional_vegetables + additional_fruits + additional_seasonings
-    
-    # 插入新数据
-    for ingredient in reversed(all_new_ingredients):  # 反向插入以保持顺序
-        rows.insert(insert_position, ingredient)
-    
-    # 写回文件
-    with open(input_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+    ChangeLog(input_file).add_many(all_new_ingredients)
     
     print(f"第三批扩展完成，成功添加 {len(all_new_ingredients)} 种食材:")
     print(f"- 补充蔬菜类: {len(additional_vegetables)} 种")
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import csv
+from change_log import ChangeLog
 
 def expand_database_batch4():
     """第四批数据库扩展 - 内脏类食材"""
@@ -28,27 +28,10 @@ def expand_database_batch4():
         ["鹅肝", "e gan", "食材", "内脏", "平", "甘", "肝", "养肝明目", "肝血不足", "血虚", "少量为宜", "高胆固醇慎", "四季", "煎/炒", "——", "——", "50-80g/餐", "——", "法式珍品，营养丰富但脂肪含量极高。", "现代营养学"]
     ]
     
-    # 读取现有CSV文件
+    # 追加到变更日志，不再整表重写；运行 change_log.py 合并进主表
     input_file = 'ingredients_master.csv'
-    rows = []
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        rows = list(reader)
-    
-    # 在最后一行之前插入新数据
-    insert_position = len(rows) - 1
-    
     all_new_ingredients = organ_meats
-    
-    # 插入新数据
-    for ingredient in reversed(all_new_ingredients):  # 反向插入以保持顺序
-        rows.insert(insert_position, ingredient)
-    
-    # 写回文件
-    with open(input_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+    ChangeLog(input_file).add_many(all_new_ingredients)
     
     print(f"第四批扩展完成，成功添加 {len(all_new_ingredients)} 种食材:")
     print(f"- 内脏类: {len(organ_meats)} 种")
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成数据库版本增量补丁
+按主键对新旧两个版本做有序归并比对，输出紧凑的新增/修改/删除补丁和版本链清单，
+已缓存数据的客户端只需下载变更部分，而不必重新下载完整数据
+
+客户端流程：
+- 没有缓存，或缓存版本低于 manifest.json 的 minVersion 时，下载 base.json（完整数据，内含 version）
+- 否则从缓存版本起按版本链依次应用 v<from>-v<to>.json 补丁，直到 current
+scripts/csv-to-json.js 生成的 data/*.json 不带版本号，recipe_ingredients.json 也来自
+recipe_ingredients_restructured.csv 而非主表，不能作为补丁的基线
+上一版本的快照是构建状态，保存在 .cache/ 下，不随站点发布；快照缺失或与 manifest 的 current 版本不一致时
+（如全新检出、CI 环境）无法得到正确的补丁，此时不生成补丁，清空版本链并把 minVersion 提到新版本，
+所有客户端重新下载 base.json
+"""
+
+import base64
+import csv
+import hashlib
+import json
+import os
+import time
+
+from atomic_io import write_json
+
+# 表名 -> (CSV文件, 主键字段)
+TABLES = {
+    'ingredients': ('ingredients_master.csv', ('name_zh',)),
+    'recipes': ('recipes_master.csv', ('title_zh',)),
+    'recipe_ingredients': ('recipe_ingredients_master.csv', ('recipe_title', 'ingredient_name_zh')),
+}
+
+DELTA_DIR = os.path.join('data', 'delta')
+MANIFEST_FILE = 'manifest.json'
+BASE_FILE = 'base.json'
+SNAPSHOT_FILE = os.path.join('.cache', 'delta_snapshot.json')
+# 旧版本把快照放在发布目录 data/delta/ 下，首次运行时迁移
+LEGACY_SNAPSHOT_FILE = 'snapshot.json'
+
+# 版本链最多保留的补丁数，更旧的客户端直接下载完整数据
+MAX_CHAIN_LENGTH = 30
+
+
+def load_table(csv_file, key_fields):
+    """读取CSV并按主键排序，返回 (字段列表, [(主键, 行)])"""
+    records = {}
+    with open(csv_file, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        key_index = [header.index(field) for field in key_fields]
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            # 跳过拼接文件时残留在中间的标题行
+            if row[0].lstrip('\ufeff') == header[0]:
+                continue
+            row = (row + [''] * len(header))[:len(header)]
+            key = tuple(row[i].strip() for i in key_index)
+            records[key] = row  # 与 deduplicate_csv 一致，后出现的覆盖前面的
+    return header, sorted(records.items())
+
+
+def table_checksum(header, records):
+    """计算表内容的校验和"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+    for key, row in records:
+        digest.update(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def diff_sorted(header, old_records, new_records):
+    """
+    有序归并比对两个按主键排序的记录列表
+    修改记录只保留发生变化的字段
+    """
+    added, updated, deleted = [], [], []
+    i = j = 0
+    while i < len(old_records) or j < len(new_records):
+        if j >= len(new_records) or (i < len(old_records) and old_records[i][0] < new_records[j][0]):
+            deleted.append(list(old_records[i][0]))
+            i += 1
+        elif i >= len(old_records) or new_records[j][0] < old_records[i][0]:
+            added.append(new_records[j][1])
+            j += 1
+        else:
+            old_row, new_row = old_records[i][1], new_records[j][1]
+            if old_row != new_row:
+                changes = {header[k]: new_row[k] for k in range(len(header)) if old_row[k] != new_row[k]}
+                updated.append([list(new_records[j][0]), changes])
+            i += 1
+            j += 1
+    return added, updated, deleted
+
+
+def apply_patch(header, records, table_patch, key_fields):
+    """
+    把单表补丁应用到记录列表上（客户端合并逻辑的参考实现），返回 (字段列表, 记录列表)
+    字段结构变化时补丁为 {'header', 'replace'}，整表替换
+    """
+    if 'replace' in table_patch:
+        header = table_patch['header']
+        key_index = [header.index(field) for field in key_fields]
+        replaced = {tuple(row[i].strip() for i in key_index): row for row in table_patch['replace']}
+        return header, sorted(replaced.items())
+    key_index = [header.index(field) for field in key_fields]
+    merged = dict(records)
+    for key in table_patch.get('delete', []):
+        merged.pop(tuple(key), None)
+    for key, changes in table_patch.get('update', []):
+        row = list(merged[tuple(key)])
+        for field, value in changes.items():
+            row[header.index(field)] = value
+        merged[tuple(key)] = row
+    for row in table_patch.get('add', []):
+        merged[tuple(row[i].strip() for i in key_index)] = row
+    return header, sorted(merged.items())
+
+
+def obfuscate(payload):
+    """与 scripts/csv-to-json.js 相同的封装格式，客户端可复用同一解码逻辑"""
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return {
+        'timestamp': int(time.time() * 1000),
+        'checksum': hashlib.sha1(text.encode('utf-8')).hexdigest()[:8],
+        'data': base64.b64encode(text.encode('utf-8')).decode('ascii')
+    }
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_snapshot(version, current_tables):
+    return {
+        'version': version,
+        'tables': {
+            table: {'header': header, 'rows': [row for _, row in records]}
+            for table, (header, records) in current_tables.items()
+        }
+    }
+
+
+def generate_delta(delta_dir=DELTA_DIR, snapshot_path=SNAPSHOT_FILE):
+    """
+    将当前CSV与上一版本快照比对，有变化时生成新版本补丁、完整数据 base.json 并更新版本链清单
+    """
+    os.makedirs(delta_dir, exist_ok=True)
+    manifest_path = os.path.join(delta_dir, MANIFEST_FILE)
+    legacy_snapshot_path = os.path.join(delta_dir, LEGACY_SNAPSHOT_FILE)
+
+    manifest = load_json(manifest_path, {'current': 0, 'checksums': {}, 'versions': []})
+    snapshot = load_json(snapshot_path, None) or load_json(legacy_snapshot_path, {'version': 0, 'tables': {}})
+
+    current_tables = {}
+    checksums = {}
+    for table, (csv_file, key_fields) in TABLES.items():
+        header, records = load_table(csv_file, key_fields)
+        current_tables[table] = (header, records)
+        checksums[table] = table_checksum(header, records)
+
+    if checksums == manifest.get('checksums') and manifest['current'] > 0:
+        if snapshot.get('version') != manifest['current']:
+            # 数据与当前版本一致，补建快照，下次变更时可以正常生成补丁
+            write_json(snapshot_path, build_snapshot(manifest['current'], current_tables), compact=True)
+        print(f"数据未变化，当前版本仍为 v{manifest['current']}")
+        return manifest
+
+    old_version = manifest['current']
+    new_version = old_version + 1
+    patch = {'from': old_version, 'to': new_version, 'tables': {}}
+    total_changes = 0
+    # 快照必须正好是上一版本，否则比对出的补丁会漏掉删除、重复新增
+    has_baseline = old_version > 0 and snapshot.get('version') == old_version
+    if old_version > 0 and not has_baseline:
+        print(f"⚠️  快照版本 v{snapshot.get('version', 0)} 与当前版本 v{old_version} 不一致，"
+              f"不生成补丁，客户端需重新下载 {BASE_FILE}")
+
+    for table, (header, records) in current_tables.items():
+        if not has_baseline:
+            break
+        old = snapshot['tables'].get(table, {'header': header, 'rows': []})
+        if old['header'] != header:
+            # 字段结构变化时无法做字段级补丁，该表整体替换
+            patch['tables'][table] = {'header': header, 'replace': [row for _, row in records]}
+            total_changes += len(records)
+            print(f"  {table}: 字段结构变化，整表替换 {len(records)} 行")
+            continue
+
+        key_fields = TABLES[table][1]
+        key_index = [header.index(field) for field in key_fields]
+        old_records = sorted((tuple(row[i].strip() for i in key_index), row) for row in old['rows'])
+        added, updated, deleted = diff_sorted(header, old_records, records)
+        if added or updated or deleted:
+            patch['tables'][table] = {'add': added, 'update': updated, 'delete': deleted}
+            total_changes += len(added) + len(updated) + len(deleted)
+        print(f"  {table}: 新增 {len(added)}，修改 {len(updated)}，删除 {len(deleted)}")
+
+    # 首个版本或快照不可用时没有可比对的基线，客户端直接使用完整数据
+    if not has_baseline:
+        for expired in manifest['versions']:
+            expired_path = os.path.join(delta_dir, expired['patch'])
+            if os.path.exists(expired_path):
+                os.remove(expired_path)
+        manifest['versions'] = []
+    else:
+        patch_file = f"v{old_version}-v{new_version}.json"
+        write_json(os.path.join(delta_dir, patch_file), obfuscate(patch), compact=True)
+        patch_size = os.path.getsize(os.path.join(delta_dir, patch_file))
+        manifest['versions'].append({
+            'from': old_version,
+            'to': new_version,
+            'patch': patch_file,
+            'size': patch_size,
+            'changes': total_changes
+        })
+        print(f"补丁文件: {patch_file} ({patch_size} 字节，{total_changes} 处变更)")
+
+    # 裁剪过长的版本链
+    while len(manifest['versions']) > MAX_CHAIN_LENGTH:
+        expired = manifest['versions'].pop(0)
+        expired_path = os.path.join(delta_dir, expired['patch'])
+        if os.path.exists(expired_path):
+            os.remove(expired_path)
+
+    manifest['current'] = new_version
+    manifest['checksums'] = checksums
+    manifest['base'] = BASE_FILE
+    manifest['minVersion'] = manifest['versions'][0]['from'] if manifest['versions'] else new_version
+    manifest['lastUpdated'] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime())
+
+    snapshot = build_snapshot(new_version, current_tables)
+    write_json(snapshot_path, snapshot, compact=True)
+    # 完整数据带上版本号，客户端据此确定从哪个补丁开始增量更新
+    write_json(os.path.join(delta_dir, BASE_FILE), obfuscate(snapshot), compact=True)
+    write_json(manifest_path, manifest)
+    if os.path.exists(legacy_snapshot_path):
+        os.remove(legacy_snapshot_path)
+
+    print(f"✅ 已生成版本 v{new_version}")
+    return manifest
+
+
+if __name__ == "__main__":
+    print("开始生成增量补丁...")
+    print("=" * 50)
+    manifest = generate_delta()
+    print("=" * 50)
+    print(f"当前版本: v{manifest['current']}")
+    print(f"可增量更新的最早版本: v{manifest['minVersion']}")
+    print(f"版本链长度: {len(manifest['versions'])}")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+为每个食材和菜谱预生成静态详情页
+在构建阶段把详情页渲染成独立 HTML（以及一份小的 JSON 片段），深链接直接由 CDN 返回，
+无需先加载整个数据库再在浏览器中渲染。
+渲染按 CPU 核数并行；每个页面记录其输入数据的哈希，输入未变化的页面跳过不重写
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from atomic_io import atomic_write
+from data_model import PLACEHOLDERS, RECIPE_FIELDS, load_ingredients, load_recipe_ingredients, load_recipes
+from recipe_finder import build_alias_map, resolve_name
+
+OUTPUT_DIR = 'pages'
+MANIFEST_FILE = os.path.join('.cache', 'static_pages.json')
+
+# 模板变化时递增，使所有页面重新生成
+TEMPLATE_VERSION = 1
+
+# 字段标题与 simpleApp.js 详情弹窗保持一致
+INGREDIENT_SECTIONS = [
+    ('四气五味', ('four_qi', 'five_flavors')),
+    ('归经', ('meridians',)),
+    ('主要功能', ('primary_functions',)),
+    ('主治', ('indications',)),
+    ('适用体质', ('constitutions_suitable',)),
+    ('体质注意', ('constitutions_caution',)),
+    ('适用季节', ('seasonality',)),
+    ('制作方法', ('prep_methods',)),
+    ('用法用量', ('dietary_dosage', 'medicinal_dosage')),
+    ('宜搭配', ('pairing_good',)),
+    ('忌搭配', ('pairing_bad',)),
+    ('禁忌', ('contraindications',)),
+    ('现代研究', ('modern_notes',)),
+    ('出处', ('source_ref',)),
+]
+RECIPE_SECTIONS = [
+    ('适用体质', ('constitution_tags',)),
+    ('适用季节', ('seasonality',)),
+    ('制作方法', ('method',)),
+    ('用法用量', ('usage',)),
+    ('注意事项', ('cautions',)),
+]
+
+UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\s#%]+')
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} · 随息居</title>
+    <meta name="description" content="{description}">
+    <link rel="stylesheet" href="../../assets/css/styles.css">
+    <link rel="stylesheet" href="../../assets/css/enhancements.css">
+</head>
+<body class="light-theme">
+    <main class="container detail-page">
+        <a class="back-link" href="../../index.html">← 返回随息居检索</a>
+        <h1>{title}</h1>
+        <div class="detail-header">
+            <div class="detail-badge {badge_class}">{badge}</div>
+            <div class="detail-tags">{tags}</div>
+        </div>
+{sections}
+    </main>
+</body>
+</html>
+"""
+
+SECTION_TEMPLATE = """        <div class="detail-section">
+            <div class="section-header"><h4>{heading}</h4></div>
+            <div class="detail-content">{content}</div>
+        </div>"""
+
+
+def make_slug(name, used):
+    slug = UNSAFE_CHARS.sub('_', name).strip('_') or 'item'
+    candidate, n = slug, 2
+    while candidate in used:
+        candidate = f"{slug}-{n}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+def collect_pages(ingredients_file='ingredients_master.csv',
+                  recipes_file='recipes_master.csv',
+                  recipe_ingredients_file='recipe_ingredients_master.csv'):
+    """整理每个页面所需的全部输入数据（含关联的配料/菜谱），页面哈希只依赖这些数据"""
+    ingredients = load_ingredients(ingredients_file)
+    recipes = load_recipes(recipes_file)
+    recipe_ingredients = load_recipe_ingredients(recipe_ingredients_file)
+
+    aliases = build_alias_map(ingredients.column('name_zh'), ingredients.key_column('name_zh'))
+    # 菜谱按加载时生成的标题键关联：标题键 -> 页面标题（最先出现的写法）
+    declared = {}
+    titles = {}
+    for record, key in zip(recipes, recipes.key_column('title_zh')):
+        declared[key] = record.to_dict()
+        titles.setdefault(key, record.title_zh)
+    for title, key in zip(recipe_ingredients.column('recipe_title'), recipe_ingredients.key_column('recipe_title')):
+        titles.setdefault(key, title)
+
+    used = set()
+    ingredient_slugs = {}
+    for name in ingredients.column('name_zh'):
+        if name not in ingredient_slugs:
+            ingredient_slugs[name] = make_slug(name, used)
+    used = set()
+    recipe_slugs = {title: make_slug(title, used) for title in titles.values()}
+
+    recipe_items = {key: [] for key in titles}
+    ingredient_recipes = {}
+    for record, title_key, name_key in zip(recipe_ingredients, recipe_ingredients.key_column('recipe_title'),
+                                           recipe_ingredients.key_column('ingredient_name_zh')):
+        canonical = resolve_name(record.ingredient_name_zh, aliases, name_key)
+        link = ingredient_slugs.get(canonical)
+        recipe_items[title_key].append([record.ingredient_name_zh, record.amount, record.note, link])
+        if link:
+            ingredient_recipes.setdefault(canonical, []).append(titles[title_key])
+
+    pages = []
+    seen = set()
+    for record, key in zip(ingredients, ingredients.key_column('name_zh')):
+        if key in seen:
+            continue
+        seen.add(key)
+        related = list(dict.fromkeys(ingredient_recipes.get(record.name_zh, [])))
+        pages.append({
+            'kind': 'ingredient',
+            'name': record.name_zh,
+            'path': f"ingredients/{ingredient_slugs[record.name_zh]}",
+            'fields': record.to_dict(),
+            'related': [[title, recipe_slugs[title]] for title in related]
+        })
+    for key, title in titles.items():
+        fields = declared.get(key, {field: '' for field in RECIPE_FIELDS})
+        fields['title_zh'] = title
+        pages.append({
+            'kind': 'recipe',
+            'name': title,
+            'path': f"recipes/{recipe_slugs[title]}",
+            'fields': fields,
+            'related': recipe_items[key]
+        })
+    return pages
+
+
+def page_hash(page):
+    text = json.dumps([TEMPLATE_VERSION, page], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def join_fields(fields, names):
+    values = [fields.get(name, '').strip() for name in names]
+    return ' / '.join(html.escape(v) for v in values if v not in PLACEHOLDERS)
+
+
+def render_ingredient(page):
+    fields = page['fields']
+    sections = []
+    for heading, names in INGREDIENT_SECTIONS:
+        content = join_fields(fields, names)
+        if content:
+            sections.append(SECTION_TEMPLATE.format(heading=heading, content=content))
+    if page['related']:
+        links = ''.join(f'<a class="recipe-link" href="../recipes/{html.escape(slug)}.html">{html.escape(title)}</a>'
+                        for title, slug in page['related'])
+        sections.append(SECTION_TEMPLATE.format(heading='相关配方', content=links))
+    return PAGE_TEMPLATE.format(
+        title=html.escape(page['name']),
+        description=html.escape(f"{page['name']}：{fields.get('primary_functions', '')}"),
+        badge_class='ingredient-badge',
+        badge=html.escape(fields.get('gate_category', '') or '食材'),
+        tags=''.join(f'<span class="tag">{html.escape(v)}</span>'
+                     for v in (fields.get('subcategory', ''), fields.get('name_pinyin', '')) if v),
+        sections='\n'.join(sections)
+    )
+
+
+def render_recipe(page):
+    fields = page['fields']
+    items = []
+    for name, amount, note, slug in page['related']:
+        label = html.escape(name)
+        if slug:
+            label = f'<a href="../ingredients/{html.escape(slug)}.html">{label}</a>'
+        extra = '，'.join(html.escape(v) for v in (amount, note) if v)
+        items.append(f'<div class="ingredient-item">{label}{f" ({extra})" if extra else ""}</div>')
+    sections = [SECTION_TEMPLATE.format(heading='配料清单', content=''.join(items) or '暂无配料信息')]
+    for heading, names in RECIPE_SECTIONS:
+        content = join_fields(fields, names)
+        if content:
+            sections.append(SECTION_TEMPLATE.format(heading=heading, content=content))
+    return PAGE_TEMPLATE.format(
+        title=html.escape(page['name']),
+        description=html.escape(f"{page['name']}：{fields.get('intent_tags', '')}"),
+        badge_class='recipe-badge',
+        badge='食疗配方',
+        tags=''.join(f'<span class="tag">{html.escape(tag.strip())}</span>'
+                     for tag in fields.get('intent_tags', '').split(',') if tag.strip()),
+        sections='\n'.join(sections)
+    )
+
+
+def write_page(page, output_dir):
+    """子进程中渲染并写出单个页面的 HTML 与 JSON 片段"""
+    base = os.path.join(output_dir, page['path'])
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    content = render_ingredient(page) if page['kind'] == 'ingredient' else render_recipe(page)
+    with atomic_write(base + '.html') as f:
+        f.write(content)
+    with atomic_write(base + '.json') as f:
+        json.dump({'kind': page['kind'], 'fields': page['fields'], 'related': page['related']},
+                  f, ensure_ascii=False, separators=(',', ':'))
+    return page['path']
+
+
+def generate_static_pages(output_dir=OUTPUT_DIR, manifest_file=MANIFEST_FILE, workers=None):
+    pages = collect_pages()
+
+    manifest = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    hashes = {page['path']: page_hash(page) for page in pages}
+    pending = [page for page in pages
+               if manifest.get(page['path']) != hashes[page['path']]
+               or not os.path.exists(os.path.join(output_dir, page['path'] + '.html'))]
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            chunksize = max(1, len(pending) // ((workers or os.cpu_count() or 1) * 4))
+            for _ in executor.map(write_page, pending, [output_dir] * len(pending), chunksize=chunksize):
+                pass
+
+    # 删除已不存在的条目对应的页面
+    removed = 0
+    for path in set(manifest) - set(hashes):
+        for suffix in ('.html', '.json'):
+            stale_file = os.path.join(output_dir, path + suffix)
+            if os.path.exists(stale_file):
+                os.remove(stale_file)
+        removed += 1
+
+    os.makedirs(os.path.dirname(manifest_file) or '.', exist_ok=True)
+    with atomic_write(manifest_file) as f:
+        json.dump(hashes, f, ensure_ascii=False)
+    with atomic_write(os.path.join(output_dir, 'index.json')) as f:
+        json.dump([[page['kind'], page['name'], page['path'] + '.html'] for page in pages],
+                  f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"页面总数: {len(pages)}，本次生成: {len(pending)}，跳过未变化: {len(pages) - len(pending)}，删除: {removed}")
+    print(f"输出目录: {output_dir}/")
+    return len(pending)
+
+
+if __name__ == "__main__":
+    print("开始生成静态详情页...")
+    print("=" * 50)
+    generate_static_pages()
@@ -1,53 +1,83 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import csv
 import sys
 
+from change_log import ChangeLog
+from name_index import load_name_index
+from text_normalize import normalize_key, normalize_text
+
+
+def name_forms(name_zh):
+    """名称本身，以及括号形式（如"米仁(薏苡仁)"）中的主名称和括号内的别名"""
+    forms = [name_zh]
+    if '(' in name_zh:
+        forms.append(name_zh.split('(')[0].strip())
+        if ')' in name_zh:
+            forms.append(name_zh.split('(')[1].split(')')[0].strip())
+    return [form for form in forms if form]
+
+
+def collect_names(csv_file):
+    """主表（叠加变更日志）中食材名称、括号形式的主名称和别名的归一化键"""
+    names = set()
+    for row in ChangeLog(csv_file).iter_rows():
+        if row and len(row) >= 1:
+            names.update(normalize_key(form) for form in name_forms(normalize_text(row[0])))
+    return names
+
+
+def collect_display_names(csv_file):
+    """归一化键 -> 主表中的原始写法（保留大小写、繁简），同一个键取最先出现的写法"""
+    display = {}
+    for row in ChangeLog(csv_file).iter_rows():
+        if row and len(row) >= 1:
+            name_zh = row[0].strip().replace('（', '(').replace('）', ')')
+            for form in name_forms(name_zh):
+                display.setdefault(normalize_key(form), form)
+    return display
+
+
 class IngredientChecker:
-    def __init__(self, csv_file='ingredients_master.csv'):
+    def __init__(self, csv_file='ingredients_master.csv', use_cache=True):
+        self.csv_file = csv_file
         self.existing_ingredients = set()
-        self.load_existing_ingredients(csv_file)
+        if use_cache:
+            try:
+                # 主表未变化时直接映射磁盘上的名称索引，不再解析CSV
+                self.existing_ingredients = load_name_index(csv_file, collect_names)
+            except FileNotFoundError:
+                print(f"错误：找不到文件 {csv_file}")
+                sys.exit(1)
+        else:
+            self.load_existing_ingredients(csv_file)
     
     def load_existing_ingredients(self, csv_file):
         """加载现有食材名称到集合中"""
         try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                next(reader)  # 跳过标题行
-                for row in reader:
-                    if row and len(row) >= 1:
-                        name_zh = row[0].strip()
-                        # 处理括号形式的别名，如"米仁(薏苡仁)"
-                        main_name = name_zh.split('(')[0].strip()
-                        self.existing_ingredients.add(name_zh)
-                        if '(' in name_zh:
-                            self.existing_ingredients.add(main_name)
-                            # 也添加括号内的名称
-                            if ')' in name_zh:
-                                alt_name = name_zh.split('(')[1].split(')')[0].strip()
-                                self.existing_ingredients.add(alt_name)
+            self.existing_ingredients.update(collect_names(csv_file))
         except FileNotFoundError:
             print(f"错误：找不到文件 {csv_file}")
             sys.exit(1)
     
     def check_duplicate(self, name_zh):
         """检查是否与现有食材重复"""
-        name_zh = name_zh.strip()
+        # 全角括号、繁体字、异体字先归一化
+        name_zh = normalize_text(name_zh)
         main_name = name_zh.split('(')[0].strip()
         
         # 检查完全匹配
-        if name_zh in self.existing_ingredients:
+        if normalize_key(name_zh) in self.existing_ingredients:
             return True, f"完全重复：'{name_zh}' 已存在"
         
         # 检查主名称匹配
-        if main_name in self.existing_ingredients:
+        if normalize_key(main_name) in self.existing_ingredients:
             return True, f"主名称重复：'{main_name}' 已存在"
         
         # 检查括号内的别名
         if '(' in name_zh and ')' in name_zh:
             alt_name = name_zh.split('(')[1].split(')')[0].strip()
-            if alt_name in self.existing_ingredients:
+            if alt_name and normalize_key(alt_name) in self.existing_ingredients:
                 return True, f"别名重复：'{alt_name}' 已存在"
         
         return False, "无重复"
@@ -65,10 +95,11 @@ class IngredientChecker:
         return results
     
     def get_statistics(self):
-        """获取现有数据库统计信息"""
+        """获取现有数据库统计信息；查重集合只存归一化键，示例名称换回主表中的原始写法"""
+        display = collect_display_names(self.csv_file)
         return {
             'total_ingredients': len(self.existing_ingredients),
-            'sample_ingredients': sorted(list(self.existing_ingredients))[:20]
+            'sample_ingredients': sorted(display.get(key, key) for key in self.existing_ingredients)[:20]
         }
 
 # 测试功能
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多来源食材表逐字段合并
+deduplicate_csv 按"最后一行为准"去重，会丢掉前面行里更完整的字段。这里把各来源按归一化后的
+name_zh 排序（超过内存批量时分段排序写入临时文件），再用 heapq.merge 做 k 路归并，
+同名记录逐字段按规则合并：
+- most_complete: 取最完整（去掉占位符后最长）的取值，长度相同时取较后的来源/行
+- prefer:<来源>: 优先取指定来源的非空取值，没有时退回 most_complete
+- union: 列表型字段（配伍、做法等）取各来源分项的并集，保持首次出现的顺序
+每条合并结果的字段来源写入 <输出文件>.provenance.jsonl
+用法: python merge_sources.py 输出文件.csv [来源名=]来源1.csv [来源名=]来源2.csv ...
+"""
+
+import csv
+import heapq
+import json
+import os
+import sys
+import tempfile
+from itertools import groupby
+
+from atomic_io import atomic_write
+from data_model import (INGREDIENT_FIELDS, LIST_SPLIT, PLACEHOLDERS, SORT_CHUNK_ROWS, external_sort,
+                        read_csv_rows)
+from text_normalize import normalize_key, normalize_text
+
+DEFAULT_RULE = 'most_complete'
+DEFAULT_RULES = {
+    'meridians': 'union',
+    'constitutions_suitable': 'union',
+    'constitutions_caution': 'union',
+    'prep_methods': 'union',
+    'pairing_good': 'union',
+    'pairing_bad': 'union',
+}
+
+
+def sorted_source(rank, path, fields, chunk_rows, tmp_dir):
+    """按归一化名称排序后的来源记录流：(键, 来源序号, 行号, {字段: 取值})"""
+    header, rows = read_csv_rows(path)
+    if 'name_zh' not in header:
+        raise ValueError(f"{path} 缺少 name_zh 列")
+    positions = [header.index(field) if field in header else None for field in fields]
+    projected = ([row[p].strip() if p is not None else '' for p in positions] for row in rows)
+    name_index = fields.index('name_zh')
+    for key, seq, row in external_sort(projected, lambda row: normalize_key(row[name_index]), chunk_rows, tmp_dir):
+        if key:
+            yield key, rank, seq, dict(zip(fields, row))
+
+
+def is_filled(value):
+    return value.strip() not in PLACEHOLDERS
+
+
+def list_items(value):
+    return [item.strip() for item in LIST_SPLIT.split(value) if item.strip() and is_filled(item)]
+
+
+def list_separator(value):
+    match = LIST_SPLIT.search(value)
+    return match.group(0) if match else ';'
+
+
+def resolve_field(rule, candidates):
+    """
+    candidates 为 [(来源名, 取值)]，按来源顺序和行顺序排列
+    返回 (合并后的取值, 贡献该取值的来源列表)
+    """
+    filled = [(label, value) for label, value in candidates if is_filled(value)]
+    if not filled:
+        return (candidates[-1][1] if candidates else ''), []
+
+    if rule == 'union':
+        items, sources, seen = [], [], set()
+        for label, value in filled:
+            for item in list_items(value):
+                key = normalize_key(item)
+                if key in seen:
+                    continue
+                seen.add(key)
+                items.append(item)
+                if label not in sources:
+                    sources.append(label)
+        if items:
+            return list_separator(filled[0][1]).join(items), sources
+
+    if rule.startswith('prefer:'):
+        preferred = [(label, value) for label, value in filled if label == rule.split(':', 1)[1]]
+        if preferred:
+            return preferred[-1][1], [preferred[-1][0]]
+
+    label, value = max(reversed(filled), key=lambda item: len(item[1].strip()))
+    return value, [label]
+
+
+def merge_group(records, fields, rules, labels):
+    """合并同名记录，返回 (合并后的行, 溯源信息, 取值不一致的字段数)"""
+    ordered = sorted(records, key=lambda item: (item[1], item[2]))
+    row = {}
+    provenance = {}
+    conflicts = 0
+    for field in fields:
+        candidates = [(labels[rank], record[field]) for _, rank, _, record in ordered]
+        if field == 'name_zh':
+            row[field] = normalize_text(ordered[0][3][field])
+            continue
+        value, sources = resolve_field(rules.get(field, DEFAULT_RULE), candidates)
+        row[field] = value
+        if sources:
+            provenance[field] = sources
+        if len({normalize_key(v) for _, v in candidates if is_filled(v)}) > 1:
+            conflicts += 1
+    info = {
+        'name_zh': row['name_zh'],
+        'sources': sorted({labels[rank] for _, rank, _, _ in ordered}, key=labels.index),
+        'records': len(ordered),
+        'fields': provenance,
+    }
+    return row, info, conflicts
+
+
+def merge_sources(sources, output_file, rules=None, fields=None, chunk_rows=SORT_CHUNK_ROWS,
+                  provenance_file=None):
+    """
+    sources 为 [(来源名, CSV路径)]，排在后面的来源视为更新的数据
+    返回统计信息 {'records', 'merged', 'conflicts'}
+    """
+    rules = {**DEFAULT_RULES, **(rules or {})}
+    labels = [label for label, _ in sources]
+    if fields is None:
+        fields = list(INGREDIENT_FIELDS)
+        for _, path in sources:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                header = [field.strip() for field in next(csv.reader(f))]
+            fields += [field for field in header if field and field not in fields]
+    provenance_file = provenance_file or output_file + '.provenance.jsonl'
+
+    stats = {'records': 0, 'merged': 0, 'conflicts': 0}
+    with tempfile.TemporaryDirectory(prefix='merge-') as tmp_dir:
+        streams = [sorted_source(rank, path, fields, chunk_rows, tmp_dir)
+                   for rank, (_, path) in enumerate(sources)]
+        merged = heapq.merge(*streams, key=lambda item: (item[0], item[1], item[2]))
+        with atomic_write(output_file, newline='') as out, atomic_write(provenance_file) as prov:
+            writer = csv.writer(out, lineterminator='\n')
+            writer.writerow(fields)
+            for _, group in groupby(merged, key=lambda item: item[0]):
+                records = list(group)
+                row, info, conflicts = merge_group(records, fields, rules, labels)
+                writer.writerow([row[field] for field in fields])
+                prov.write(json.dumps(info, ensure_ascii=False) + '\n')
+                stats['records'] += 1
+                stats['merged'] += len(records) > 1
+                stats['conflicts'] += conflicts
+    return stats
+
+
+def parse_source(arg):
+    if '=' in arg and not os.path.exists(arg):
+        label, path = arg.split('=', 1)
+        return label, path
+    return os.path.splitext(os.path.basename(arg))[0], arg
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("用法: python merge_sources.py 输出文件.csv [来源名=]来源1.csv [来源名=]来源2.csv ...")
+        sys.exit(1)
+    output_file = sys.argv[1]
+    sources = [parse_source(arg) for arg in sys.argv[2:]]
+
+    print(f"合并 {len(sources)} 个来源: {', '.join(label for label, _ in sources)}")
+    stats = merge_sources(sources, output_file)
+    print(f"合并后记录数: {stats['records']}，其中 {stats['merged']} 条由多行合并，"
+          f"字段取值不一致 {stats['conflicts']} 处")
+    print(f"结果已保存到: {output_file}")
+    print(f"字段来源记录: {output_file}.provenance.jsonl")
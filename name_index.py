@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+食材名称索引的磁盘缓存
+把查重用的名称/别名集合排序后写成可内存映射的二进制文件，文件头记录主表及其变更日志的
+大小、修改时间和内容哈希。主表未变化时直接映射缓存文件，无需重新解析CSV；
+多个进程映射同一文件时共享操作系统的页缓存，不必各自持有一份集合
+
+文件格式（整数均为小端 uint32）:
+    MAGIC | 文件头长度 | 文件头 JSON | 名称数 n | n+1 个偏移量 | 按 UTF-8 字节序排列的名称
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+
+from atomic_io import atomic_write
+
+MAGIC = b'SXJNAME1'
+UINT = struct.Struct('<I')
+
+# 名称归一化规则变化时递增，使旧缓存失效
+NORMALIZATION_VERSION = 3
+
+
+def cache_path(csv_file):
+    """缓存放在主表所在目录的 .cache/ 下"""
+    directory = os.path.dirname(os.path.abspath(csv_file))
+    return os.path.join(directory, '.cache', os.path.basename(csv_file) + '.names.idx')
+
+
+def source_files(csv_file):
+    return [csv_file, csv_file + '.changes.jsonl']
+
+
+def source_state(csv_file):
+    """主表及变更日志的 (大小, 修改时间)，日志不存在时记为空"""
+    state = []
+    for path in source_files(csv_file):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            if path == csv_file:
+                raise
+            state.append(None)
+            continue
+        state.append([st.st_size, st.st_mtime_ns])
+    return state
+
+
+def source_digest(csv_file):
+    digest = hashlib.sha1()
+    for path in source_files(csv_file):
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class NameIndex:
+    """只读的排序名称集合，支持 in / len / 迭代"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:len(MAGIC)] != MAGIC:
+            self.buffer.close()
+            raise ValueError(f"不是名称索引文件: {path}")
+        pos = len(MAGIC)
+        header_len, = UINT.unpack_from(self.buffer, pos)
+        pos += UINT.size
+        self.header = json.loads(self.buffer[pos:pos + header_len].decode('utf-8'))
+        pos += header_len
+        self.count, = UINT.unpack_from(self.buffer, pos)
+        self.offsets_start = pos + UINT.size
+        self.data_start = self.offsets_start + (self.count + 1) * UINT.size
+
+    def key(self, i):
+        start, end = struct.unpack_from('<II', self.buffer, self.offsets_start + i * UINT.size)
+        return self.buffer[self.data_start + start:self.data_start + end]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self.key(i).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.key(i).decode('utf-8')
+
+    def __contains__(self, name):
+        if not isinstance(name, str):
+            return False
+        target = name.encode('utf-8')
+        i = bisect_left(_KeyView(self), target)
+        return i < self.count and self.key(i) == target
+
+    def close(self):
+        self.buffer.close()
+
+
+class _KeyView:
+    """让 bisect 直接在映射内存上按字节比较，不解码"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.count
+
+    def __getitem__(self, i):
+        return self.index.key(i)
+
+
+def write_index(path, names, header):
+    """排序后原子写入"""
+    keys = sorted({name.encode('utf-8') for name in names})
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(key))
+
+    with atomic_write(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(UINT.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(UINT.pack(len(keys)))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(b''.join(keys))
+
+
+def load_name_index(csv_file, build, cache_file=None):
+    """
+    返回 csv_file 的名称索引；build(csv_file) 在缓存缺失或过期时被调用，返回名称集合
+    大小和修改时间都未变时直接复用；仅修改时间变化而内容哈希相同时只刷新文件头
+    缓存目录不可写时退回内存中的集合
+    """
+    cache_file = cache_file or cache_path(csv_file)
+    state = source_state(csv_file)
+
+    index = None
+    if os.path.exists(cache_file):
+        try:
+            index = NameIndex(cache_file)
+        except (OSError, ValueError):
+            index = None
+    if index is not None and index.header.get('version') != NORMALIZATION_VERSION:
+        index.close()
+        index = None
+
+    if index is not None and index.header.get('state') == state:
+        return index
+
+    digest = source_digest(csv_file)
+    if index is not None and index.header.get('sha1') == digest:
+        names = list(index)
+    else:
+        names = build(csv_file)
+    if index is not None:
+        index.close()
+
+    header = {'version': NORMALIZATION_VERSION, 'source': os.path.basename(csv_file),
+              'state': state, 'sha1': digest}
+    try:
+        write_index(cache_file, names, header)
+    except OSError:
+        return frozenset(names)
+    return NameIndex(cache_file)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else 'ingredients_master.csv'
+    path = cache_path(csv_file)
+    if not os.path.exists(path):
+        print(f"缓存不存在: {path}")
+        sys.exit(1)
+    start = time.perf_counter()
+    index = NameIndex(path)
+    elapsed = (time.perf_counter() - start) * 1000
+    fresh = index.header.get('state') == source_state(csv_file)
+    print(f"缓存: {path}")
+    print(f"名称数: {len(index)}，打开耗时 {elapsed:.2f} 毫秒，{'与主表一致' if fresh else '已过期'}")
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拼音检索键
+name_pinyin 字段的读音拆分，以及一个读音展开出的全拼（san qi）、连写拼音（sanqi）和首字母（sq）检索键，
+供拼音索引（build_pinyin_index）和自动补全索引（build_completion_index）共用
+"""
+
+
+def split_readings(name_pinyin):
+    """name_pinyin 可能以分号给出多个读音，如 'jiang;sheng jiang'"""
+    return [reading.strip().lower() for reading in name_pinyin.split(';') if reading.strip()]
+
+
+def pinyin_keys(reading):
+    """一个读音展开为全拼、连写拼音和首字母三种检索键"""
+    syllables = reading.split()
+    return {
+        reading,
+        ''.join(syllables),
+        ''.join(syllable[0] for syllable in syllables)
+    }
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式数据画像
+单次遍历任意主表CSV（或供应商导出的大文件），在有限内存内统计每一列的：
+- 基数估计（HyperLogLog）
+- 高频取值（Space-Saving 前 K 名），并标出占比过高的模板化取值
+- 空值/占位符（——）比例
+- 取值长度与分词个数分布
+以及整行 SimHash 聚类，找出除名称外内容几乎相同的模板化记录
+用法: python profile_csv.py [CSV文件 ...]
+"""
+
+import csv
+import re
+import sys
+
+from data_model import LIST_SPLIT, PLACEHOLDERS
+from sketches import HyperLogLog, SpaceSaving, hash64
+
+TOKEN_SPLIT = re.compile(r'[;；、,，/\s]+')
+
+# 某个取值占非空行的比例超过该值即视为模板化内容
+BOILERPLATE_SHARE = 0.05
+
+# 长度分布按 2 的幂分桶：0, 1, 2-3, 4-7, ...
+LENGTH_BUCKETS = 12
+
+
+class Histogram:
+    """固定分桶的长度分布"""
+
+    def __init__(self):
+        self.buckets = [0] * LENGTH_BUCKETS
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+    def add(self, n):
+        self.buckets[min(n.bit_length(), LENGTH_BUCKETS - 1)] += 1
+        self.total += n
+        self.count += 1
+        self.max = max(self.max, n)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def describe(self):
+        parts = []
+        for i, n in enumerate(self.buckets):
+            if not n:
+                continue
+            low = 0 if i == 0 else 1 << (i - 1)
+            high = 0 if i == 0 else (1 << i) - 1
+            label = f"{low}" if low == high else (f"{low}+" if i == LENGTH_BUCKETS - 1 else f"{low}-{high}")
+            parts.append(f"{label}:{n}")
+        return ' '.join(parts)
+
+
+def list_signature(value):
+    """列表型取值忽略顺序后的签名，单个取值原样返回"""
+    items = [t.strip() for t in LIST_SPLIT.split(value) if t.strip()]
+    if len(items) < 2:
+        return value
+    return ';'.join(sorted(set(items)))
+
+
+class ColumnProfile:
+    def __init__(self, name, top_k):
+        self.name = name
+        self.rows = 0
+        self.empty = 0
+        self.placeholder = 0
+        self.cardinality = HyperLogLog()
+        self.frequent = SpaceSaving(top_k)
+        # 多值字段按分词集合统计，"肾;肝;肺" 与 "肺;肝;肾" 视为同一取值
+        self.frequent_sets = SpaceSaving(top_k)
+        self.lengths = Histogram()
+        self.tokens = Histogram()
+
+    def add(self, value):
+        self.rows += 1
+        value = value.strip()
+        if not value:
+            self.empty += 1
+            return
+        if value in PLACEHOLDERS:
+            self.placeholder += 1
+            return
+        self.cardinality.add(value)
+        self.frequent.add(value)
+        tokens = [t for t in TOKEN_SPLIT.split(value) if t]
+        self.lengths.add(len(value))
+        self.tokens.add(len(tokens))
+        signature = list_signature(value)
+        if signature != value:
+            self.frequent_sets.add(signature)
+
+    def top(self, n=3, sketch=None):
+        """保证计数（计数减去误差上界）大于 1 的高频取值"""
+        sketch = sketch or self.frequent
+        return [(value, count - error) for value, count, error in sketch.top(n) if count - error > 1]
+
+    def boilerplate(self):
+        """占比超过阈值、且长度足以视为模板文本的高频取值，多值字段同时按忽略顺序的分词集合判断"""
+        filled = self.rows - self.empty - self.placeholder
+        if not filled:
+            return []
+        found = {}
+        for sketch in (self.frequent, self.frequent_sets):
+            for value, count in self.top(5, sketch):
+                if count >= BOILERPLATE_SHARE * filled and len(value) >= 8:
+                    found.setdefault(list_signature(value), (value, count))
+        return sorted(found.values(), key=lambda item: -item[1])
+
+
+def simhash(features):
+    """64 位 SimHash"""
+    weights = [0] * 64
+    for feature in features:
+        h = hash64(feature)
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class NearDuplicateClusters:
+    """
+    SimHash 近似重复聚类：64 位指纹切成 4 段，任一段相同即为候选，
+    汉明距离不超过 max_distance 归入同一簇；簇代表数量有上限以保证内存有界
+    """
+
+    BANDS = 4
+
+    def __init__(self, max_distance=3, max_clusters=20000, examples=5):
+        self.max_distance = max_distance
+        self.max_clusters = max_clusters
+        self.examples = examples
+        self.fingerprints = []
+        self.sizes = []
+        self.samples = []
+        self.bands = [{} for _ in range(self.BANDS)]
+        self.unclustered = 0
+
+    def band_keys(self, fingerprint):
+        width = 64 // self.BANDS
+        return [(fingerprint >> (i * width)) & ((1 << width) - 1) for i in range(self.BANDS)]
+
+    def add(self, fingerprint, label):
+        keys = self.band_keys(fingerprint)
+        for band, key in zip(self.bands, keys):
+            for cluster in band.get(key, ()):
+                if bin(self.fingerprints[cluster] ^ fingerprint).count('1') <= self.max_distance:
+                    self.sizes[cluster] += 1
+                    if len(self.samples[cluster]) < self.examples:
+                        self.samples[cluster].append(label)
+                    return
+        if len(self.fingerprints) >= self.max_clusters:
+            self.unclustered += 1
+            return
+        cluster = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        self.sizes.append(1)
+        self.samples.append([label])
+        for band, key in zip(self.bands, keys):
+            band.setdefault(key, []).append(cluster)
+
+    def largest(self, n=10, min_size=2):
+        order = sorted(range(len(self.sizes)), key=lambda c: -self.sizes[c])
+        return [(self.sizes[c], self.samples[c]) for c in order[:n] if self.sizes[c] >= min_size]
+
+
+def profile_csv(csv_file, top_k=50, key_column=0):
+    """单次遍历CSV，返回 (总行数, 各列画像, 近似重复聚类)"""
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = [ColumnProfile(name, top_k) for name in header]
+        clusters = NearDuplicateClusters()
+        total = 0
+        for row in reader:
+            if not row or row[0].lstrip('\ufeff') == header[0]:
+                continue
+            total += 1
+            row = (row + [''] * len(header))[:len(header)]
+            for column, value in zip(columns, row):
+                column.add(value)
+            # 聚类时排除名称列，只看内容是否雷同
+            features = [f"{header[i]}={token}"
+                        for i, value in enumerate(row) if i != key_column
+                        for token in TOKEN_SPLIT.split(value.strip()) if token]
+            clusters.add(simhash(features), row[key_column])
+            if total % 100000 == 0:
+                print(f"  已处理 {total} 行...", file=sys.stderr)
+    return total, columns, clusters
+
+
+def print_report(csv_file, total, columns, clusters):
+    print(f"\n📄 {csv_file}: {total} 行，{len(columns)} 列")
+    print("-" * 60)
+    for column in columns:
+        rows = column.rows or 1
+        print(f"【{column.name}】基数≈{column.cardinality.estimate()}，"
+              f"空值 {column.empty / rows:.1%}，占位符 {column.placeholder / rows:.1%}，"
+              f"平均长度 {column.lengths.mean():.1f}（最长 {column.lengths.max}），"
+              f"平均分词 {column.tokens.mean():.1f}")
+        print(f"    长度分布: {column.lengths.describe()}")
+        top = ', '.join(f"{value[:16]}×{count}" for value, count in column.top(3))
+        print(f"    高频取值: {top or '无'}")
+        for value, count in column.boilerplate():
+            print(f"    ⚠️  模板化取值（{count} 行）: {value[:40]}")
+
+    print(f"\n🔁 近似重复记录簇（除名称外内容几乎相同）:")
+    largest = clusters.largest()
+    if not largest:
+        print("    无")
+    for size, samples in largest:
+        print(f"    {size} 行: {', '.join(samples)}{' ...' if size > len(samples) else ''}")
+    if clusters.unclustered:
+        print(f"    聚类容量已满，另有 {clusters.unclustered} 行未参与聚类")
+
+
+if __name__ == "__main__":
+    files = sys.argv[1:] or ['ingredients_master.csv']
+    for csv_file in files:
+        total, columns, clusters = profile_csv(csv_file)
+        print_report(csv_file, total, columns, clusters)
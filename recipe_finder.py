@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+"家里有什么能做什么" 反向检索
+建立 食材 -> 菜谱 的倒排索引，并把每个菜谱的配料表示为位图（Python 整数），
+给定现有食材集合即可用位运算回答：
+- 完全可做：菜谱所需配料全部具备
+- 最多缺 k 样：缺少的配料不超过 k 个
+- 部分匹配排序：按已具备配料占比排序
+配料名称会按 ingredients_master.csv 解析别名（全角括号、繁体字等先归一化），常见调味/饮用水等基础配料可选择忽略
+"""
+
+import time
+
+from data_model import load_ingredients, load_recipe_ingredients
+from text_normalize import normalize_key, normalize_text
+
+# 家中常备、默认不计入所需配料的基础配料
+STAPLES = {
+    '开水', '温水', '清水', '水', '生姜', '姜', '葱', '葱白', '香葱', '大蒜',
+    '盐', '食盐', '冰糖', '白糖', '红糖', '蜂蜜', '料酒', '白酒', '生抽', '老抽', '食用油', '植物油'
+}
+
+
+def split_alias(name):
+    """拆出主名称和括号内名称，如 '田七(三七)' -> ('田七', '三七')，'核桃仁(熟)' -> ('核桃仁', '熟')"""
+    name = normalize_text(name)
+    if '(' not in name:
+        return name, ''
+    main_name = name.split('(')[0].strip()
+    inner = name.split('(')[1].split(')')[0].strip() if ')' in name else ''
+    return main_name, inner
+
+
+def build_alias_map(names, keys=None):
+    """
+    名称及其主名称、括号内别名的归一化键 -> 规范名称，
+    如 '米仁(薏苡仁)' 的 '米仁'、'薏苡仁'、'米仁（薏苡仁）' 都指向该食材
+    keys 为 names 对应的归一化键列（data_model 加载时已生成），省略时逐个计算
+    """
+    aliases = {}
+    if keys is None:
+        keys = [normalize_key(name) for name in names]
+    for name, key in zip(names, keys):
+        aliases.setdefault(key, name)
+        main_name, inner = split_alias(name)
+        for alias in (main_name, inner):
+            if alias:
+                aliases.setdefault(normalize_key(alias), name)
+    return aliases
+
+
+def resolve_name(name, aliases, key=None):
+    """把配料名称解析为规范名称；未收录的配料去掉括号备注后原样返回。key 为已算好的归一化键"""
+    if key is None:
+        key = normalize_key(name)
+    if key in aliases:
+        return aliases[key]
+    main_name, inner = split_alias(name)
+    for alias in (main_name, inner):
+        if alias and normalize_key(alias) in aliases:
+            return aliases[normalize_key(alias)]
+    return main_name
+
+
+class RecipeFinder:
+    """基于位图的菜谱反向检索"""
+
+    def __init__(self, ingredients_file='ingredients_master.csv',
+                 recipe_ingredients_file='recipe_ingredients_master.csv',
+                 ignore_staples=True):
+        self.ignore_staples = ignore_staples
+        self.aliases = {}            # 名称/别名 -> 规范名称
+        self.ingredient_ids = {}     # 规范名称 -> 位序号
+        self.ingredient_names = []
+        self.recipe_titles = []
+        self.recipe_bits = []        # 菜谱序号 -> 所需配料位图
+        self.postings = {}           # 配料位序号 -> 包含该配料的菜谱位图
+        self.size_buckets = {}       # 所需配料数（不含常备配料时已扣除）-> 菜谱位图
+        self.staple_bits = 0
+        self.load_aliases(ingredients_file)
+        self.build_index(recipe_ingredients_file)
+
+    def load_aliases(self, ingredients_file):
+        """从食材总表建立别名映射，直接使用加载时生成的名称键列"""
+        table = load_ingredients(ingredients_file)
+        self.aliases = build_alias_map(table.column('name_zh'), table.key_column('name_zh'))
+
+    def resolve(self, name, key=None):
+        """未收录的配料去掉括号备注后作为独立配料"""
+        return resolve_name(name, self.aliases, key)
+
+    def ingredient_bit(self, name, create=False, key=None):
+        canonical = self.resolve(name, key)
+        bit = self.ingredient_ids.get(canonical)
+        if bit is None and create:
+            bit = len(self.ingredient_names)
+            self.ingredient_ids[canonical] = bit
+            self.ingredient_names.append(canonical)
+        return bit
+
+    def build_index(self, recipe_ingredients_file):
+        table = load_recipe_ingredients(recipe_ingredients_file)
+        # 按加载时生成的键列关联，写法不同的同一菜谱/配料不再逐行归一化
+        recipe_ids = {}
+        for record, title_key, name_key in zip(table, table.key_column('recipe_title'),
+                                               table.key_column('ingredient_name_zh')):
+            recipe_id = recipe_ids.get(title_key)
+            if recipe_id is None:
+                recipe_id = recipe_ids[title_key] = len(self.recipe_titles)
+                self.recipe_titles.append(record.recipe_title)
+                self.recipe_bits.append(0)
+            bit = self.ingredient_bit(record.ingredient_name_zh, create=True, key=name_key)
+            self.recipe_bits[recipe_id] |= 1 << bit
+            self.postings[bit] = self.postings.get(bit, 0) | (1 << recipe_id)
+
+        for staple in STAPLES:
+            bit = self.ingredient_bit(staple)
+            if bit is not None:
+                self.staple_bits |= 1 << bit
+
+        for recipe_id in range(len(self.recipe_titles)):
+            size = self.required_bits(recipe_id).bit_count()
+            self.size_buckets[size] = self.size_buckets.get(size, 0) | (1 << recipe_id)
+
+    def required_bits(self, recipe_id):
+        required = self.recipe_bits[recipe_id]
+        if self.ignore_staples:
+            required &= ~self.staple_bits
+        return required
+
+    def pantry_bits(self, pantry):
+        """现有食材集合转换为位图，未出现在任何菜谱中的食材直接忽略"""
+        bits = 0
+        for name in pantry:
+            bit = self.ingredient_bit(name)
+            if bit is not None:
+                bits |= 1 << bit
+        if self.ignore_staples:
+            bits |= self.staple_bits
+        return bits
+
+    def candidates(self, pantry_bits, max_missing=None):
+        """
+        倒排索引求并集：至少用到一样现有食材的菜谱；
+        再加上所需配料数不超过 max_missing 的菜谱（即使一样现有食材都没用到，缺的也不超过 max_missing），
+        以及只需常备配料、所需配料为空的菜谱
+        """
+        recipes = self.size_buckets.get(0, 0)
+        if max_missing is not None:
+            for size in range(1, max_missing + 1):
+                recipes |= self.size_buckets.get(size, 0)
+        remaining = pantry_bits & ~self.staple_bits if self.ignore_staples else pantry_bits
+        while remaining:
+            low = remaining & -remaining
+            recipes |= self.postings.get(low.bit_length() - 1, 0)
+            remaining ^= low
+        while recipes:
+            low = recipes & -recipes
+            yield low.bit_length() - 1
+            recipes ^= low
+
+    def names_of(self, bits):
+        names = []
+        while bits:
+            low = bits & -bits
+            names.append(self.ingredient_names[low.bit_length() - 1])
+            bits ^= low
+        return names
+
+    def match(self, pantry, max_missing=None, min_coverage=0.0, limit=None):
+        """
+        按现有食材检索菜谱
+        max_missing 为 0 时只返回完全可做的菜谱；为 None 时返回所有部分匹配并按覆盖率排序
+        """
+        have = self.pantry_bits(pantry)
+        results = []
+        for recipe_id in self.candidates(have, max_missing):
+            required = self.required_bits(recipe_id)
+            missing = required & ~have
+            missing_count = missing.bit_count()
+            if max_missing is not None and missing_count > max_missing:
+                continue
+            total = required.bit_count()
+            # 只需常备配料的菜谱视为完全具备
+            coverage = (total - missing_count) / total if total else 1.0
+            if coverage < min_coverage:
+                continue
+            results.append({
+                'title': self.recipe_titles[recipe_id],
+                'coverage': coverage,
+                'missing_count': missing_count,
+                'missing': self.names_of(missing)
+            })
+        results.sort(key=lambda r: (r['missing_count'], -r['coverage'], r['title']))
+        return results[:limit] if limit else results
+
+    def fully_covered(self, pantry):
+        return self.match(pantry, max_missing=0)
+
+    def missing_at_most(self, pantry, k):
+        return self.match(pantry, max_missing=k)
+
+    def ranked(self, pantry, limit=10):
+        results = self.match(pantry)
+        results.sort(key=lambda r: (-r['coverage'], r['missing_count'], r['title']))
+        return results[:limit]
+
+
+if __name__ == "__main__":
+    finder = RecipeFinder()
+    print(f"菜谱数: {len(finder.recipe_titles)}，不同配料数: {len(finder.ingredient_names)}")
+
+    pantry = ['大米', '枸杞子', '红枣', '鸡蛋', '山药', '小米', '南瓜', '薏米', '赤小豆']
+    print(f"\n现有食材: {', '.join(pantry)}（忽略常备调料）")
+
+    start = time.perf_counter()
+    full = finder.fully_covered(pantry)
+    elapsed = (time.perf_counter() - start) * 1e6
+    print(f"\n完全可做 ({len(full)} 个，耗时 {elapsed:.0f} 微秒):")
+    for r in full:
+        print(f"  ✅ {r['title']}")
+
+    print("\n最多缺 1 样:")
+    for r in finder.missing_at_most(pantry, 1):
+        if r['missing_count']:
+            print(f"  ➕ {r['title']} 缺: {', '.join(r['missing'])}")
+
+    print("\n部分匹配前 5:")
+    for r in finder.ranked(pantry, limit=5):
+        print(f"  {r['coverage']:.0%} {r['title']}")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按用量加权计算菜谱的四气、五味、归经综合属性
+把每种食材的属性编码为向量，按 recipe_ingredients_master.csv 中解析出的克数加权汇总到菜谱，
+并与 recipes_master.csv 中手工标注的体质、季节标签对比，标出明显矛盾的菜谱。
+计算全部以 NumPy 数组完成；结果按菜谱内容哈希缓存，未变化的菜谱不重复计算
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+from atomic_io import atomic_write
+from data_model import load_ingredients, load_recipe_ingredients, load_recipes
+from recipe_finder import build_alias_map, resolve_name
+
+# 四气的寒热程度（负为寒凉，正为温热）及归入的五档
+QI_SCORES = {'大寒': -3.0, '寒': -2.0, '微寒': -1.5, '凉': -1.0, '平': 0.0,
+             '微温': 1.0, '温': 1.5, '热': 2.0, '大热': 3.0}
+QI_CLASSES = ['寒', '凉', '平', '温', '热']
+QI_CLASS_OF = {'大寒': '寒', '寒': '寒', '微寒': '凉', '凉': '凉', '平': '平',
+               '微温': '温', '温': '温', '热': '热', '大热': '热'}
+
+FLAVORS = ['酸', '苦', '甘', '辛', '咸', '淡', '涩']
+MERIDIANS = ['大肠', '小肠', '膀胱', '三焦', '心包', '肝', '心', '脾', '肺', '肾', '胃', '胆']
+
+# 非克/毫升单位的估算克数
+UNIT_GRAMS = {'g': 1, '克': 1, 'kg': 1000, '千克': 1000, 'ml': 1, '毫升': 1, 'l': 1000, '升': 1000,
+              '斤': 500, '两': 50, '片': 3, '枚': 8, '颗': 5, '粒': 1, '个': 100, '只': 500,
+              '根': 50, '段': 10, '小段': 10, '张': 20, '勺': 10, '小勺': 5, '匙': 10, '杯': 200,
+              '碗': 250, '把': 30, '朵': 5, '块': 50, '条': 300, '瓣': 5, '撮': 2, '滴': 0.05}
+VAGUE_GRAMS = {'适量': 5, '少许': 2, '少量': 2}
+CHINESE_NUMBERS = {'半': 0.5, '一': 1, '两': 2, '二': 2, '三': 3, '四': 4, '五': 5,
+                   '六': 6, '七': 7, '八': 8, '九': 9, '十': 10}
+# 数量可为整数、小数或分数（'1/4个'）
+NUMBER = r'\d+(?:\.\d+)?(?:\s*/\s*\d+(?:\.\d+)?)?'
+AMOUNT_PATTERN = re.compile(rf'({NUMBER})(?:\s*[-~～]\s*({NUMBER}))?\s*([a-zA-Z一-鿿]*)')
+
+# 体质、季节与寒热倾向的对应关系：(标签, 期望方向, 提示)
+EXPECTATIONS = [
+    ('阳虚', 1, '阳虚体质配方整体偏寒凉'),
+    ('气虚', 1, '气虚体质配方整体偏寒凉'),
+    ('湿热', -1, '湿热体质配方整体偏温热'),
+    ('阴虚', -1, '阴虚体质配方整体偏温热'),
+    ('燥热', -1, '燥热体质配方整体偏温热'),
+]
+SEASON_EXPECTATIONS = [('夏', -1, '夏季配方整体偏温热'), ('冬', 1, '冬季配方整体偏寒凉')]
+
+# 寒热程度超过该值才判定为矛盾
+CONFLICT_THRESHOLD = 0.75
+
+# 参与加权的用量中能匹配到食材属性的比例低于该值时不做矛盾判断
+MIN_COVERAGE = 0.5
+
+CACHE_FILE = os.path.join('.cache', 'recipe_profiles.json')
+# 用量解析或加权规则变化时递增，使缓存的结果全部失效
+PROFILE_VERSION = 3
+
+
+def parse_number(text):
+    """'3'、'1.5'、'1/4' -> 数值"""
+    if '/' not in text:
+        return float(text)
+    numerator, denominator = (float(part) for part in text.split('/'))
+    return numerator / denominator if denominator else numerator
+
+
+def parse_amount(amount):
+    """把 '30g'、'10-15g'、'1/4个'、'2片'、'半个'、'适量' 等用量解析为估算克数"""
+    amount = (amount or '').strip()
+    if not amount:
+        return VAGUE_GRAMS['适量']
+    for word, grams in VAGUE_GRAMS.items():
+        if amount.startswith(word):
+            return grams
+    if amount[0] in CHINESE_NUMBERS:
+        number = CHINESE_NUMBERS[amount[0]]
+        unit = amount[1:]
+        return number * UNIT_GRAMS.get(unit, UNIT_GRAMS.get(unit[-1:], 10))
+    match = AMOUNT_PATTERN.match(amount)
+    if not match:
+        return VAGUE_GRAMS['适量']
+    try:
+        low = parse_number(match.group(1))
+        high = parse_number(match.group(2)) if match.group(2) else low
+    except ValueError:
+        # 单条用量写法异常时按适量估算，不中断整个画像构建
+        return VAGUE_GRAMS['适量']
+    unit = match.group(3).lower()
+    grams = UNIT_GRAMS.get(unit, UNIT_GRAMS.get(unit[-1:], 1 if not unit else 10))
+    return (low + high) / 2 * grams
+
+
+def split_values(value):
+    return [v.strip() for v in re.split(r'[,，、;；/\s]+', value or '') if v.strip()]
+
+
+def property_matrix(ingredients):
+    """
+    食材属性矩阵，每行依次为：寒热程度、五档四气分布、五味分布、归经分布
+    多值字段在各取值间平均分配
+    """
+    n = len(ingredients)
+    qi_score = np.zeros(n)
+    qi_dist = np.zeros((n, len(QI_CLASSES)))
+    flavor_dist = np.zeros((n, len(FLAVORS)))
+    meridian_dist = np.zeros((n, len(MERIDIANS)))
+    known = np.zeros(n, dtype=bool)
+
+    four_qi = ingredients.column('four_qi')
+    five_flavors = ingredients.column('five_flavors')
+    meridians = ingredients.column('meridians')
+    for i in range(n):
+        qi_values = [v for v in split_values(four_qi[i]) if v in QI_SCORES]
+        if qi_values:
+            known[i] = True
+            qi_score[i] = sum(QI_SCORES[v] for v in qi_values) / len(qi_values)
+            for v in qi_values:
+                qi_dist[i, QI_CLASSES.index(QI_CLASS_OF[v])] += 1 / len(qi_values)
+
+        flavors = [FLAVORS.index(char) for char in five_flavors[i] if char in FLAVORS]
+        for index in set(flavors):
+            flavor_dist[i, index] = 1 / len(set(flavors))
+
+        channels = set()
+        for value in split_values(meridians[i]):
+            for index, name in enumerate(MERIDIANS):
+                if value.startswith(name):
+                    channels.add(index)
+                    break
+        for index in channels:
+            meridian_dist[i, index] = 1 / len(channels)
+
+    return np.column_stack([qi_score, qi_dist, flavor_dist, meridian_dist]), known
+
+
+def content_hash(title, rows, properties):
+    """菜谱内容哈希：计算规则版本、菜谱标签、配料行以及所引用食材的属性"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([PROFILE_VERSION, title, rows, properties], ensure_ascii=False,
+                             sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def compute_profiles(recipe_index, ingredient_index, grams, matrix, known, n_recipes):
+    """向量化汇总：各配料属性按克数加权累加到所属菜谱并归一化"""
+    weights = grams * known[ingredient_index]
+    weighted = matrix[ingredient_index] * weights[:, None]
+    sums = np.zeros((n_recipes, matrix.shape[1]))
+    np.add.at(sums, recipe_index, weighted)
+    matched = np.bincount(recipe_index, weights=weights, minlength=n_recipes)
+    total = np.bincount(recipe_index, weights=grams, minlength=n_recipes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profiles = np.where(matched[:, None] > 0, sums / matched[:, None], 0.0)
+        coverage = np.where(total > 0, matched / total, 0.0)
+    return profiles, coverage
+
+
+def detect_conflicts(temperature, coverage, constitution_tags, seasonality):
+    if coverage < MIN_COVERAGE:
+        return []
+    flags = []
+    tags = split_values(constitution_tags)
+    for tag, direction, message in EXPECTATIONS:
+        if tag in tags and temperature * direction < -CONFLICT_THRESHOLD:
+            flags.append(message)
+    for season, direction, message in SEASON_EXPECTATIONS:
+        if season in (seasonality or '') and '四季' not in seasonality and temperature * direction < -CONFLICT_THRESHOLD:
+            flags.append(message)
+    return flags
+
+
+def describe(vector, labels, top=3):
+    order = np.argsort(-vector)[:top]
+    return ';'.join(f"{labels[i]}{vector[i]:.0%}" for i in order if vector[i] > 0.05)
+
+
+def build_recipe_profiles(ingredients_file='ingredients_master.csv',
+                          recipes_file='recipes_master.csv',
+                          recipe_ingredients_file='recipe_ingredients_master.csv',
+                          output_file='recipe_profiles.csv',
+                          cache_file=CACHE_FILE):
+    """计算所有菜谱的综合属性，输出CSV并返回结果列表"""
+    ingredients = load_ingredients(ingredients_file)
+    recipes = load_recipes(recipes_file)
+    recipe_ingredients = load_recipe_ingredients(recipe_ingredients_file)
+
+    names = ingredients.column('name_zh')
+    aliases = build_alias_map(names)
+    ingredient_ids = {name: i for i, name in enumerate(names)}
+    matrix, known = property_matrix(ingredients)
+
+    declared = {r.title_zh: r for r in recipes}
+    titles = list(dict.fromkeys(recipe_ingredients.column('recipe_title')))
+    recipe_ids = {title: i for i, title in enumerate(titles)}
+
+    # 配料行 -> (菜谱序号, 食材序号, 克数)，未收录的食材计入总用量但不贡献属性
+    recipe_rows = {title: [] for title in titles}
+    recipe_index, ingredient_index, grams = [], [], []
+    for record in recipe_ingredients:
+        canonical = resolve_name(record.ingredient_name_zh, aliases)
+        recipe_rows[record.recipe_title].append([record.ingredient_name_zh, record.amount])
+        recipe_index.append(recipe_ids[record.recipe_title])
+        ingredient_index.append(ingredient_ids.get(canonical, -1))
+        grams.append(parse_amount(record.amount))
+    recipe_index = np.array(recipe_index, dtype=np.int64)
+    ingredient_index = np.array(ingredient_index, dtype=np.int64)
+    grams = np.array(grams)
+
+    # 未收录食材指向追加的全零属性行
+    matrix = np.vstack([matrix, np.zeros(matrix.shape[1])])
+    known = np.append(known, False)
+    ingredient_index[ingredient_index < 0] = len(names)
+
+    cache = {}
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    hashes = []
+    for title in titles:
+        row = declared.get(title)
+        properties = []
+        for name, _ in recipe_rows[title]:
+            index = ingredient_ids.get(resolve_name(name, aliases))
+            if index is not None:
+                properties.append([ingredients.get(index, 'four_qi'), ingredients.get(index, 'five_flavors'),
+                                   ingredients.get(index, 'meridians')])
+        tags = [row.constitution_tags, row.seasonality] if row else []
+        hashes.append(content_hash(title, [tags, recipe_rows[title]], properties))
+
+    stale = np.array([cache.get(title, {}).get('hash') != h for title, h in zip(titles, hashes)])
+    if stale.any():
+        # 只对内容变化的菜谱做向量化计算
+        selected = stale[recipe_index]
+        remap = np.cumsum(stale) - 1
+        profiles, coverage = compute_profiles(remap[recipe_index[selected]], ingredient_index[selected],
+                                              grams[selected], matrix, known, int(stale.sum()))
+        for local, recipe_id in enumerate(np.flatnonzero(stale)):
+            title = titles[recipe_id]
+            vector = profiles[local]
+            row = declared.get(title)
+            temperature = float(vector[0])
+            cache[title] = {
+                'hash': hashes[recipe_id],
+                'temperature': round(temperature, 3),
+                'qi': describe(vector[1:1 + len(QI_CLASSES)], QI_CLASSES),
+                'flavors': describe(vector[1 + len(QI_CLASSES):1 + len(QI_CLASSES) + len(FLAVORS)], FLAVORS),
+                'meridians': describe(vector[1 + len(QI_CLASSES) + len(FLAVORS):], MERIDIANS),
+                'coverage': round(float(coverage[local]), 3),
+                'flags': detect_conflicts(temperature, float(coverage[local]),
+                                          row.constitution_tags if row else '', row.seasonality if row else '')
+            }
+
+    # 清理已删除菜谱的缓存
+    cache = {title: cache[title] for title in titles}
+    if cache_file:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        with atomic_write(cache_file) as f:
+            json.dump(cache, f, ensure_ascii=False)
+
+    results = []
+    with atomic_write(output_file, encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['菜谱名称', '寒热倾向', '四气构成', '五味构成', '归经构成', '属性覆盖率',
+                         '标注体质', '标注季节', '矛盾提示'])
+        for title in titles:
+            profile = cache[title]
+            row = declared.get(title)
+            writer.writerow([title, profile['temperature'], profile['qi'], profile['flavors'],
+                             profile['meridians'], profile['coverage'],
+                             row.constitution_tags if row else '', row.seasonality if row else '',
+                             '; '.join(profile['flags'])])
+            results.append(dict(profile, title=title))
+
+    print(f"菜谱数: {len(titles)}，本次重新计算: {int(stale.sum())}，命中缓存: {len(titles) - int(stale.sum())}")
+    print(f"结果保存到: {output_file}")
+    return results
+
+
+if __name__ == "__main__":
+    print("开始计算菜谱综合属性...")
+    print("=" * 50)
+    results = build_recipe_profiles()
+
+    flagged = [r for r in results if r['flags']]
+    print(f"\n与标注标签矛盾的菜谱: {len(flagged)} 个")
+    for r in flagged[:10]:
+        print(f"  ⚠️  {r['title']}（寒热 {r['temperature']:+.2f}，{r['qi']}）: {'; '.join(r['flags'])}")
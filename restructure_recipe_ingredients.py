@@ -9,6 +9,8 @@ import pandas as pd
 import csv
 from collections import defaultdict
 
+from atomic_io import atomic_write
+
 def restructure_recipe_ingredients(input_file, output_file):
     """
     重构菜谱配料数据结构
@@ -73,7 +75,8 @@ def restructure_recipe_ingredients(input_file, output_file):
     print(f"保存到文件: {output_file}")
     
     # 保存为CSV
-    new_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    with atomic_write(output_file, encoding='utf-8-sig', newline='') as f:
+        new_df.to_csv(f, index=False)
     
     return new_df, recipes
 
@@ -100,7 +103,8 @@ def create_compact_summary(recipes, output_file):
     
     summary_df = pd.DataFrame(summary_data)
     summary_df = summary_df.sort_values('菜谱名称')
-    summary_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    with atomic_write(output_file, encoding='utf-8-sig', newline='') as f:
+        summary_df.to_csv(f, index=False)
     
     print(f"摘要报告保存到: {output_file}")
     return summary_df
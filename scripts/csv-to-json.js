@@ -32,6 +32,26 @@ class CSVToJSONConverter {
         return Buffer.from(str, 'base64').toString('utf-8');
     }
 
+    /**
+     * 原子写入：先写同目录临时文件并刷盘，再重命名覆盖，中断时不会留下半截的 JSON
+     */
+    writeFileAtomic(filePath, content) {
+        const tmpPath = `${filePath}.${process.pid}.tmp`;
+        const fd = fs.openSync(tmpPath, 'w');
+        try {
+            fs.writeFileSync(fd, content);
+            fs.fsyncSync(fd);
+        } finally {
+            fs.closeSync(fd);
+        }
+        try {
+            fs.renameSync(tmpPath, filePath);
+        } catch (err) {
+            fs.rmSync(tmpPath, { force: true });
+            throw err;
+        }
+    }
+
     /**
      * 读取CSV文件并转换为JSON
      */
@@ -65,7 +85,7 @@ class CSVToJSONConverter {
                         data: this.obfuscate(JSON.stringify(results))
                     };
 
-                    fs.writeFileSync(jsonPath, JSON.stringify(obfuscatedData, null, 2));
+                    this.writeFileAtomic(jsonPath, JSON.stringify(obfuscatedData, null, 2));
                     console.log(`✅ Converted ${results.length} records to ${jsonFileName}`);
                     resolve(results.length);
                 })
@@ -137,7 +157,7 @@ class CSVToJSONConverter {
         };
 
         const configPath = path.join(this.outputDir, 'api-config.json');
-        fs.writeFileSync(configPath, JSON.stringify(config, null, 2));
+        this.writeFileAtomic(configPath, JSON.stringify(config, null, 2));
         console.log('📄 API configuration saved to api-config.json');
     }
 }
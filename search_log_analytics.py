@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索日志分析
+逐行读取服务端收集或从浏览器导出的搜索日志（NDJSON，可为 .gz；也接受整行为 searchHistory 数组的导出），
+在有限内存内统计：
+- 热门搜索词、无结果搜索词、慢查询（Space-Saving 前 K 名），不同搜索词个数（HyperLogLog）
+- 搜索词 -> 点击条目的配对（Space-Saving）
+- 响应时间分位数（对数分桶直方图，相对误差约 1%）
+- 同义词候选：同一会话内无结果的搜索在短时间内被改写为有结果的搜索，以及搜索词与所点击条目名称不同的配对
+完整报告（含用户原始搜索词）写入 .cache/search_log_report.json，只供本地查看；
+构建脚本需要的 boosts 和 synonyms 单独写入 .cache/search_boosts.json，build_completion_index 读取 boosts
+作为补全权重，symptom_search 读取 synonyms 扩展症状同义词。两者都不在 data/ 下，不随站点发布和预缓存
+
+日志每行一个事件，字段（缺省的字段忽略）:
+    {"ts": 1718000000000, "session": "s1", "query": "失眠", "results": 12, "latency_ms": 35, "clicked": "酸枣仁"}
+results 也可写作 resultCount，ts 也可写作 timestamp（毫秒、秒或 ISO 时间）
+用法: python search_log_analytics.py 日志1.ndjson [日志2.ndjson.gz ...]   （- 表示标准输入）
+"""
+
+import gzip
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from atomic_io import write_json
+from sketches import HyperLogLog, SpaceSaving
+from text_normalize import normalize_key, normalize_text
+
+OUTPUT_FILE = os.path.join('.cache', 'search_boosts.json')
+REPORT_FILE = os.path.join('.cache', 'search_log_report.json')
+# 旧版本把完整报告写在发布目录 data/ 下，运行时删除
+LEGACY_OUTPUT_FILE = os.path.join('data', 'search_boosts.json')
+
+TOP_K = 1000
+# 响应时间超过该值（毫秒）的搜索计为慢查询
+SLOW_QUERY_MS = 500
+# 无结果搜索之后多少秒内的有结果搜索视为改写
+REFORMULATION_WINDOW = 120
+# 同时跟踪的会话数上限，超出时淘汰最久未活动的会话
+MAX_SESSIONS = 10000
+# 同义词候选至少出现的次数
+MIN_SYNONYM_SUPPORT = 2
+MAX_SYNONYMS = 5
+
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencySketch:
+    """
+    对数分桶直方图：第 i 个桶覆盖 (gamma^(i-1), gamma^i]，分位数的相对误差不超过 accuracy，
+    桶数只与取值跨度的对数有关；超过 max_buckets 时合并最低的桶
+    """
+
+    def __init__(self, accuracy=0.01, max_buckets=2048):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.max = 0
+
+    def add(self, value):
+        self.count += 1
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            low, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(low)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # 桶内取使相对误差最小的代表值
+                return min(2 * self.gamma ** index / (self.gamma + 1), self.max)
+        return self.max
+
+    def describe(self):
+        summary = {f"p{p}": round(self.quantile(p / 100), 1) for p in LATENCY_PERCENTILES}
+        summary.update(count=self.count, max=round(self.max, 1))
+        return summary
+
+
+def parse_timestamp(value):
+    """毫秒/秒时间戳或 ISO 时间 -> 秒；无法解析时返回 None"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def open_log(path):
+    if path == '-':
+        sys.stdin.reconfigure(encoding='utf-8')
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_events(paths):
+    """逐行产出事件字典；整行为数组时（导出的 searchHistory）逐项产出，无法解析的行计数后跳过"""
+    stats = {'lines': 0, 'invalid': 0}
+    for path in paths:
+        f = open_log(path)
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                stats['lines'] += 1
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    stats['invalid'] += 1
+                    continue
+                for event in data if isinstance(data, list) else [data]:
+                    if isinstance(event, dict) and str(event.get('query') or '').strip():
+                        yield event
+                    else:
+                        stats['invalid'] += 1
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        print(f"  {path}: 累计 {stats['lines']} 行，无效 {stats['invalid']} 行", file=sys.stderr)
+
+
+def guaranteed(sketch):
+    """Space-Saving 各项计数的下界（计数减去误差），只统计真正出现过的次数，排除替换进来的低频项"""
+    return {value: count - sketch.errors[value] for value, count in sketch.counts.items()
+            if count > sketch.errors[value]}
+
+
+class SearchLogAnalyzer:
+    """单次遍历日志的统计状态，内存占用只与 TOP_K、会话数上限和分桶数有关"""
+
+    def __init__(self, top_k=TOP_K, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self.events = 0
+        self.zero_events = 0
+        self.distinct = HyperLogLog()
+        self.popular = SpaceSaving(top_k)
+        self.zero_results = SpaceSaving(top_k)
+        self.slow = SpaceSaving(top_k)
+        self.clicked_items = SpaceSaving(top_k)
+        self.clicks = SpaceSaving(top_k)
+        self.reformulations = SpaceSaving(top_k)
+        self.latency = LatencySketch()
+        # 会话 -> (最近一次无结果的搜索词, 时间)
+        self.pending = OrderedDict()
+
+    def add(self, event):
+        query = normalize_text(str(event['query']))
+        key = normalize_key(query)
+        if not key:
+            return
+        self.events += 1
+        self.distinct.add(key)
+        self.popular.add(query)
+
+        results = event.get('results', event.get('resultCount'))
+        latency = event.get('latency_ms')
+        if isinstance(latency, (int, float)):
+            self.latency.add(latency)
+            if latency >= self.slow_ms:
+                self.slow.add(query)
+
+        clicked = normalize_text(str(event.get('clicked') or ''))
+        if clicked:
+            self.clicked_items.add(clicked)
+            self.clicks.add((query, clicked))
+
+        session = event.get('session')
+        ts = parse_timestamp(event.get('ts', event.get('timestamp')))
+        if results == 0:
+            self.zero_events += 1
+            self.zero_results.add(query)
+            if session is not None and ts is not None:
+                self.pending[session] = (query, ts)
+                self.pending.move_to_end(session)
+                if len(self.pending) > MAX_SESSIONS:
+                    self.pending.popitem(last=False)
+        elif session in self.pending and ts is not None:
+            failed, failed_ts = self.pending.pop(session)
+            if 0 <= ts - failed_ts <= REFORMULATION_WINDOW and normalize_key(failed) != key:
+                self.reformulations.add((failed, query))
+
+    def boosts(self):
+        """
+        补全权重：有结果的搜索次数 + 条目被点击的次数（均取计数下界）；键为搜索词或条目名称，
+        与 build_completion_index 中候选条目的文本对应
+        """
+        zero = self.zero_results.counts
+        boosts = {}
+        for query, count in guaranteed(self.popular).items():
+            count -= zero.get(query, 0)
+            if count > 0:
+                boosts[query] = count
+        for item, count in guaranteed(self.clicked_items).items():
+            boosts[item] = boosts.get(item, 0) + count
+        return dict(sorted(boosts.items(), key=lambda item: (-item[1], item[0])))
+
+    def synonyms(self, min_support=MIN_SYNONYM_SUPPORT, limit=MAX_SYNONYMS):
+        """同义词候选 {搜索词: [候选词]}，按支持次数降序；改写和点击两类证据的次数相加"""
+        support = {}
+        for sketch in (self.reformulations, self.clicks):
+            for (query, candidate), count in guaranteed(sketch).items():
+                if normalize_key(query) != normalize_key(candidate):
+                    support[(query, candidate)] = support.get((query, candidate), 0) + count
+        synonyms = {}
+        for (query, candidate), count in sorted(support.items(), key=lambda item: (-item[1], item[0])):
+            if count >= min_support and len(synonyms.setdefault(query, [])) < limit:
+                synonyms[query].append(candidate)
+        return {query: candidates for query, candidates in synonyms.items() if candidates}
+
+    def report(self, n=20):
+        def top(sketch):
+            return [{'query': value, 'count': count, 'error': error} for value, count, error in sketch.top(n)]
+
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'events': self.events,
+            'distinct_queries': self.distinct.estimate(),
+            'zero_result_rate': round(self.zero_events / self.events, 4) if self.events else 0,
+            'latency_ms': self.latency.describe(),
+            'popular': top(self.popular),
+            'zero_result': top(self.zero_results),
+            'slow': top(self.slow),
+            'clicks': [{'query': query, 'item': item, 'count': count}
+                       for (query, item), count, _ in self.clicks.top(n)],
+            'boosts': self.boosts(),
+            'synonyms': self.synonyms(),
+        }
+
+
+def analyze(paths, output_file=OUTPUT_FILE, report_file=REPORT_FILE, top_k=TOP_K, slow_ms=SLOW_QUERY_MS):
+    analyzer = SearchLogAnalyzer(top_k, slow_ms)
+    for event in iter_events(paths):
+        analyzer.add(event)
+    result = analyzer.report()
+    write_json(report_file, result)
+    write_json(output_file, {'boosts': result['boosts'], 'synonyms': result['synonyms']})
+    if os.path.exists(LEGACY_OUTPUT_FILE) and os.path.abspath(output_file) != os.path.abspath(LEGACY_OUTPUT_FILE):
+        os.remove(LEGACY_OUTPUT_FILE)
+    return result
+
+
+def print_report(result):
+    print(f"\n搜索事件: {result['events']}，不同搜索词≈{result['distinct_queries']}，"
+          f"无结果比例 {result['zero_result_rate']:.1%}")
+    latency = result['latency_ms']
+    if latency['count']:
+        print("响应时间(毫秒): " + '，'.join(f"p{p} {latency[f'p{p}']}" for p in LATENCY_PERCENTILES)
+              + f"，最大 {latency['max']}")
+    for title, key in (('热门搜索', 'popular'), ('无结果搜索', 'zero_result'), ('慢查询', 'slow')):
+        items = ', '.join(f"{item['query']}×{item['count']}" for item in result[key][:10])
+        print(f"{title}: {items or '无'}")
+    clicks = ', '.join(f"{item['query']}→{item['item']}×{item['count']}" for item in result['clicks'][:10])
+    print(f"搜索→点击: {clicks or '无'}")
+    synonyms = '; '.join(f"{query}: {'/'.join(values)}" for query, values in list(result['synonyms'].items())[:10])
+    print(f"同义词候选: {synonyms or '无'}")
+    print(f"补全权重 {len(result['boosts'])} 条，同义词候选 {len(result['synonyms'])} 条")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python search_log_analytics.py 日志1.ndjson [日志2.ndjson.gz ...]   （- 表示标准输入）")
+        sys.exit(1)
+
+    start = time.time()
+    result = analyze(sys.argv[1:])
+    print_report(result)
+    print(f"完整报告已保存到: {REPORT_FILE}")
+    print(f"补全权重和同义词已保存到: {OUTPUT_FILE}（耗时 {time.time() - start:.1f} 秒）")
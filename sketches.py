@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式统计草图
+单次遍历、固定内存的近似统计结构，供数据画像（profile_csv）和搜索日志分析（search_log_analytics）共用：
+- HyperLogLog：基数估计
+- SpaceSaving：高频项前 K 名
+"""
+
+import hashlib
+import heapq
+import math
+
+
+def hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """基数估计，2^p 个寄存器，p=12 时标准误差约 1.6%"""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        x = hash64(value)
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # 小基数时改用线性计数
+            return round(self.m * math.log(self.m / zeros))
+        return round(estimate)
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频项统计，最多跟踪 k 个取值，计数误差不超过 N/k
+    最小计数项用最小堆查找：每个取值在堆中只有一个条目，计数增加时不更新堆（条目为计数下界），
+    出堆时发现计数已变大再按当前计数放回，淘汰的均摊代价为 O(log k)，命中已跟踪的取值为 O(1)
+    """
+
+    def __init__(self, k=50):
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+        self.heap = []
+        # 序号用于计数相同时的次序，避免比较取值本身
+        self.seq = 0
+
+    def push(self, value):
+        self.seq += 1
+        heapq.heappush(self.heap, (self.counts[value], self.seq, value))
+
+    def pop_min(self):
+        while True:
+            count, _, value = heapq.heappop(self.heap)
+            if self.counts[value] == count:
+                return value
+            self.push(value)
+
+    def add(self, value, count=1):
+        if value in self.counts:
+            self.counts[value] += count
+            return
+        if len(self.counts) < self.k:
+            self.counts[value] = count
+            self.errors[value] = 0
+        else:
+            victim = self.pop_min()
+            floor = self.counts.pop(victim)
+            self.errors.pop(victim)
+            self.counts[value] = floor + count
+            self.errors[value] = floor
+        self.push(value)
+
+    def top(self, n=10):
+        items = sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+        return [(value, count, self.errors[value]) for value, count in items]
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导出检索结果
+按筛选条件逐行读取食材/菜谱主表，经生成器直接写出 CSV（utf-8-sig，带 BOM 便于 Excel 打开）、
+NDJSON 或 XLSX，不在内存中拼出完整结果；菜谱同时导出拼接好的配料清单。
+菜谱主表和配料表各自按标题外部排序（超过批量时分段写入临时文件）后归并关联，
+全库导出也只占用与一个排序批量相当的内存；关联和输出顺序都按归一化后的标题键，
+全角/繁体写法不同的同名菜谱也能对上配料
+
+用法:
+    python stream_export.py --kind ingredient --where four_qi=温 --format xlsx -o 温性食材.xlsx
+    python stream_export.py --kind recipe --query 健脾 --format ndjson
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+import zipfile
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from xml.sax.saxutils import escape
+
+from atomic_io import atomic_write
+from data_model import INGREDIENT_FIELDS, RECIPE_FIELDS, external_sort, read_csv_rows
+from text_normalize import normalize_key
+
+INGREDIENTS_FILE = 'ingredients_master.csv'
+RECIPES_FILE = 'recipes_master.csv'
+RECIPE_INGREDIENTS_FILE = 'recipe_ingredients_master.csv'
+
+RECIPE_EXPORT_FIELDS = RECIPE_FIELDS + ('ingredients',)
+
+# 食材和菜谱混合导出时的列，与 searchEngine.js 的 exportResults 保持一致
+SUMMARY_COLUMNS = [
+    ('名称', 'name_zh', 'title_zh'),
+    ('类型', None, None),
+    ('分类', 'gate_category', None),
+    ('功效', 'primary_functions', 'intent_tags'),
+    ('体质', 'constitutions_suitable', 'constitution_tags'),
+    ('四气', 'four_qi', None),
+    ('五味', 'five_flavors', None),
+    ('季节', 'seasonality', 'seasonality'),
+]
+
+# 过滤时缓存的归一化结果数：字段取值重复很多，缓存有上限以保持流式导出的内存占用
+KEY_CACHE_SIZE = 65536
+
+# XML 1.0 不允许的控制字符
+XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def make_filter(where=(), query=None):
+    """
+    构造行过滤函数：where 为 [(字段, 取值)]，字段取值包含该值即匹配（多个条件同时满足）；
+    query 在所有字段中查找。比较前统一归一化，全角/繁体写法也能命中；
+    同一取值只归一化一次（按过滤函数缓存）
+    """
+    conditions = [(field, normalize_key(value)) for field, value in where]
+    query_key = normalize_key(query) if query else ''
+    key_of = lru_cache(maxsize=KEY_CACHE_SIZE)(normalize_key)
+
+    def accept(record):
+        for field, value in conditions:
+            if value not in key_of(record.get(field, '')):
+                return False
+        if query_key and not any(query_key in key_of(v) for v in record.values()):
+            return False
+        return True
+
+    return accept
+
+
+def iter_rows(csv_file, fields):
+    """逐行读取主表，返回按 fields 取值的字典"""
+    header, rows = read_csv_rows(csv_file)
+    positions = [header.index(field) if field in header else None for field in fields]
+    for row in rows:
+        yield {field: row[position].strip() if position is not None else ''
+               for field, position in zip(fields, positions)}
+
+
+def sorted_by(records, field):
+    """按字段的归一化键外部排序，产出 (键, 记录)，同一键内保持原有顺序"""
+    rows = external_sort(records, lambda record: normalize_key(record[field]))
+    return ((key, record) for key, _, record in rows)
+
+
+def iter_ingredient_lists(recipe_ingredients_file=RECIPE_INGREDIENTS_FILE):
+    """
+    按标题键顺序产出 (标题键, 菜谱标题, 配料文本)，配料文本如 '雪梨 1枚; 川贝母 3g'，每次只拼接一个菜谱；
+    写法不同的同名标题合为一组，标题取组内第一行
+    """
+    rows = iter_rows(recipe_ingredients_file, ('recipe_title', 'ingredient_name_zh', 'amount'))
+    for key, group in groupby(sorted_by(rows, 'recipe_title'), key=itemgetter(0)):
+        group = [row for _, row in group]
+        yield key, group[0]['recipe_title'], '; '.join(
+            f"{row['ingredient_name_zh']} {row['amount']}".strip() for row in group)
+
+
+def iter_ingredients(accept, ingredients_file=INGREDIENTS_FILE):
+    for record in iter_rows(ingredients_file, INGREDIENT_FIELDS):
+        if accept(record):
+            yield record
+
+
+def ingredient_only_recipe(title, ingredients):
+    """只在配料表中出现的菜谱，其余字段为空"""
+    record = {field: '' for field in RECIPE_FIELDS}
+    record['title_zh'] = title
+    record['ingredients'] = ingredients
+    return record
+
+
+def iter_recipes(accept, recipes_file=RECIPES_FILE, recipe_ingredients_file=RECIPE_INGREDIENTS_FILE):
+    """
+    主表中的菜谱，以及只在配料表中出现的菜谱，按标题键顺序输出
+    两边都按标题键排序后归并：主表同名的多行共用一份配料文本
+    """
+    lists = iter_ingredient_lists(recipe_ingredients_file)
+    current = next(lists, None)
+    recipes = sorted_by(iter_rows(recipes_file, RECIPE_FIELDS), 'title_zh')
+    for key, group in groupby(recipes, key=itemgetter(0)):
+        while current is not None and current[0] < key:
+            record = ingredient_only_recipe(*current[1:])
+            if accept(record):
+                yield record
+            current = next(lists, None)
+        ingredients = ''
+        if current is not None and current[0] == key:
+            ingredients = current[2]
+            current = next(lists, None)
+        for _, record in group:
+            record['ingredients'] = ingredients
+            if accept(record):
+                yield record
+    while current is not None:
+        record = ingredient_only_recipe(*current[1:])
+        if accept(record):
+            yield record
+        current = next(lists, None)
+
+
+def iter_summary(accept):
+    """食材和菜谱混合导出，按 SUMMARY_COLUMNS 转换为统一的列"""
+    for kind, label, records in (('ingredient', '食材', iter_ingredients(accept)),
+                                 ('recipe', '配方', iter_recipes(accept))):
+        for record in records:
+            row = {}
+            for heading, ingredient_field, recipe_field in SUMMARY_COLUMNS:
+                field = ingredient_field if kind == 'ingredient' else recipe_field
+                row[heading] = label if heading == '类型' else record.get(field, '') if field else ''
+            yield row
+
+
+def select(kind, accept):
+    """返回 (列名, 记录生成器)"""
+    if kind == 'ingredient':
+        return list(INGREDIENT_FIELDS), iter_ingredients(accept)
+    if kind == 'recipe':
+        return list(RECIPE_EXPORT_FIELDS), iter_recipes(accept)
+    return [heading for heading, _, _ in SUMMARY_COLUMNS], iter_summary(accept)
+
+
+def write_csv(columns, records, f):
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(columns)
+    count = 0
+    for record in records:
+        writer.writerow([record.get(column, '') for column in columns])
+        count += 1
+    return count
+
+
+def write_ndjson(columns, records, f):
+    count = 0
+    for record in records:
+        f.write(json.dumps({column: record.get(column, '') for column in columns}, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def xlsx_row(row_number, values):
+    cells = ''.join(
+        f'<c r="{column_letter(i)}{row_number}" t="inlineStr"><is><t xml:space="preserve">'
+        f'{escape(XML_ILLEGAL.sub("", value))}</t></is></c>'
+        for i, value in enumerate(values) if value
+    )
+    return f'<row r="{row_number}">{cells}</row>'
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="导出" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def write_xlsx(columns, records, f):
+    """
+    手写最小 XLSX：工作表使用内联字符串，逐行压缩写入 zip 条目，
+    不需要 openpyxl，也不需要先收集全部行来建立共享字符串表
+    """
+    count = 0
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            sheet.write(xlsx_row(1, columns).encode('utf-8'))
+            for record in records:
+                count += 1
+                values = [record.get(column, '') for column in columns]
+                sheet.write(xlsx_row(count + 1, values).encode('utf-8'))
+            sheet.write(b'</sheetData></worksheet>')
+    return count
+
+
+WRITERS = {'csv': write_csv, 'ndjson': write_ndjson, 'xlsx': write_xlsx}
+
+
+def export(kind='ingredient', fmt='csv', output=None, where=(), query=None):
+    """导出到文件（output 为 None 时 CSV/NDJSON 写到标准输出），返回导出行数"""
+    columns, records = select(kind, make_filter(where, query))
+    writer = WRITERS[fmt]
+    if fmt == 'xlsx':
+        if not output:
+            raise ValueError("XLSX 导出需要指定输出文件")
+        with atomic_write(output, 'wb') as f:
+            return writer(columns, records, f)
+    if not output:
+        sys.stdout.reconfigure(encoding='utf-8')
+        return writer(columns, records, sys.stdout)
+    encoding = 'utf-8-sig' if fmt == 'csv' else 'utf-8'
+    with atomic_write(output, encoding=encoding, newline='') as f:
+        return writer(columns, records, f)
+
+
+def parse_where(conditions):
+    parsed = []
+    for condition in conditions:
+        if '=' not in condition:
+            raise ValueError(f"筛选条件应为 字段=取值: {condition}")
+        field, value = condition.split('=', 1)
+        parsed.append((field.strip(), value.strip()))
+    return parsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='流式导出食材/菜谱检索结果')
+    parser.add_argument('--kind', choices=['ingredient', 'recipe', 'all'], default='ingredient')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='csv')
+    parser.add_argument('--where', action='append', default=[], help='字段=取值，可重复')
+    parser.add_argument('--query', help='在所有字段中查找的关键词')
+    parser.add_argument('-o', '--output', help='输出文件，省略时写到标准输出（XLSX 除外）')
+    args = parser.parse_args()
+
+    try:
+        count = export(args.kind, args.format, args.output, parse_where(args.where), args.query)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"已导出 {count} 条记录" + (f"到 {args.output}" if args.output else ''), file=sys.stderr)
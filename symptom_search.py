@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按症状检索食材和菜谱
+构建阶段把食材的 indications、primary_functions 和菜谱的 intent_tags 切分为词项（整词 + 汉字二元组），
+计算 TF-IDF 并按行做 L2 归一化，以 CSC（按词项分列）稀疏格式保存到 data/symptom_index.json。
+查询时把多个症状及其同义词展开为查询向量，只取查询词项对应的列做一次稀疏矩阵-向量乘法
+（np.bincount 按条目累加），对每个症状分别打分后按命中症状数、总分排序
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from atomic_io import atomic_write
+from data_model import PLACEHOLDERS, load_ingredients, load_recipes
+from text_normalize import normalize_key, normalize_text
+
+INDEX_FILE = os.path.join('data', 'symptom_index.json')
+SEARCH_BOOSTS_FILE = os.path.join('.cache', 'search_boosts.json')
+
+# 参与索引的字段及权重
+INGREDIENT_FIELD_WEIGHTS = {'indications': 1.0, 'primary_functions': 0.8}
+RECIPE_FIELD_WEIGHTS = {'intent_tags': 1.0}
+
+TERM_SPLIT = re.compile(r'[,，、;；/\s()（）:：。.]+')
+CJK_PATTERN = re.compile(r'[一-鿿]')
+
+# 二元组权重低于整词，避免 "失眠" 与 "眠多" 之类的片段喧宾夺主
+BIGRAM_WEIGHT = 0.5
+SYNONYM_WEIGHT = 0.6
+
+# 常见症状的口语说法 -> 数据中的主治/功效写法
+SYMPTOM_SYNONYMS = {
+    '失眠': ['不寐', '失眠多梦', '多梦', '安神', '养心安神'],
+    '睡不着': ['失眠', '不寐', '安神'],
+    '便秘': ['大便秘结', '肠燥便秘', '润肠通便', '通便'],
+    '咳嗽': ['咳喘', '久咳', '止咳', '化痰止咳', '润肺止咳'],
+    '腹泻': ['泄泻', '久泻', '止泻', '涩肠止泻'],
+    '拉肚子': ['腹泻', '泄泻', '止泻'],
+    '食欲不振': ['食少', '纳差', '纳呆', '开胃', '消食'],
+    '消化不良': ['食积', '积滞', '消食', '健胃消食'],
+    '水肿': ['浮肿', '利水', '利水消肿', '消肿'],
+    '贫血': ['血虚', '补血', '养血'],
+    '乏力': ['疲劳', '倦怠', '气虚', '补气', '益气'],
+    '疲劳': ['乏力', '倦怠', '补气', '益气'],
+    '口干': ['口渴', '津伤', '生津', '生津止渴'],
+    '咽痛': ['咽喉肿痛', '咽喉', '利咽'],
+    '盗汗': ['自汗', '多汗', '敛汗', '止汗'],
+    '感冒': ['风寒', '风热', '外感', '解表'],
+    '上火': ['热证', '清热', '泻火', '清热泻火'],
+    '头痛': ['头疼', '偏头痛'],
+    '月经不调': ['调经', '经期', '痛经'],
+    '痛经': ['调经止痛', '月经不调'],
+    '高血压': ['血压', '降压'],
+    '高血脂': ['血脂', '降脂'],
+    '高血糖': ['血糖', '降糖', '消渴'],
+    '恶心': ['呕吐', '止呕', '降逆止呕'],
+    '胃痛': ['胃脘痛', '脘腹疼痛', '和胃止痛'],
+}
+
+
+def split_terms(text):
+    """字段文本切成词项，去掉 "(现代)" 之类的来源标注"""
+    text = re.sub(r'[(（][^)）]*[)）]', ' ', normalize_text(text))
+    return [normalize_key(term) for term in TERM_SPLIT.split(text) if term not in PLACEHOLDERS]
+
+
+def term_features(term):
+    """整词及其汉字二元组：{特征: 权重}"""
+    features = {term: 1.0}
+    if len(term) > 2 and CJK_PATTERN.match(term):
+        for i in range(len(term) - 1):
+            bigram = term[i:i + 2]
+            features[bigram] = max(features.get(bigram, 0), BIGRAM_WEIGHT)
+    return features
+
+
+def load_synonyms(search_boosts_file=SEARCH_BOOSTS_FILE):
+    """内置同义词，加上搜索日志分析（search_log_analytics）挖掘出的同义词候选"""
+    synonyms = {normalize_key(k): [normalize_key(v) for v in values] for k, values in SYMPTOM_SYNONYMS.items()}
+    if search_boosts_file and os.path.exists(search_boosts_file):
+        with open(search_boosts_file, 'r', encoding='utf-8') as f:
+            mined = json.load(f).get('synonyms', {})
+        for query, candidates in mined.items():
+            values = synonyms.setdefault(normalize_key(query), [])
+            values += [normalize_key(c) for c in candidates if normalize_key(c) not in values]
+    return synonyms
+
+
+class SymptomIndex:
+    """条目 × 词项的 TF-IDF 稀疏矩阵，按列（CSC）存储"""
+
+    def __init__(self, items, vocabulary, indptr, indices, data, synonyms=None):
+        self.items = items
+        self.vocabulary = vocabulary
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float32)
+        self.synonyms = synonyms or {}
+
+    @classmethod
+    def build(cls, documents, synonyms=None):
+        """
+        documents 为 [(条目, {特征: 词频})]，词频按二元组和字段权重折算，可以小于 1；
+        用 1 + log(1 + tf) 做次线性缩放，折算后的权重差别在任何词频下都保留
+        """
+        items = [item for item, _ in documents]
+        df = Counter()
+        for _, counts in documents:
+            df.update(counts.keys())
+        vocabulary = sorted(df)
+        term_ids = {term: i for i, term in enumerate(vocabulary)}
+        n = len(documents)
+
+        rows, cols, values = [], [], []
+        for row, (_, counts) in enumerate(documents):
+            weights = {term: (1 + math.log1p(tf)) * (math.log((n + 1) / (df[term] + 1)) + 1)
+                       for term, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                rows.append(row)
+                cols.append(term_ids[term])
+                values.append(weight / norm)
+
+        # COO -> CSC：按列排序后由每列的非零个数得到列指针
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        values = np.asarray(values, dtype=np.float32)
+        order = np.lexsort((rows, cols))
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(vocabulary)), out=indptr[1:])
+        return cls(items, vocabulary, indptr, rows[order], values[order], synonyms)
+
+    @classmethod
+    def load(cls, index_file=INDEX_FILE, search_boosts_file=SEARCH_BOOSTS_FILE):
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['items'], data['vocabulary'], data['indptr'], data['indices'], data['data'],
+                   load_synonyms(search_boosts_file))
+
+    def save(self, index_file=INDEX_FILE):
+        with atomic_write(index_file) as f:
+            json.dump({
+                'items': self.items,
+                'vocabulary': self.vocabulary,
+                'indptr': self.indptr.tolist(),
+                'indices': self.indices.tolist(),
+                'data': [round(float(v), 4) for v in self.data],
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+    def type_mask(self, item_type):
+        if not hasattr(self, '_type_masks'):
+            types = np.array([item['type'] for item in self.items])
+            self._type_masks = {t: types == t for t in set(types.tolist())}
+        return self._type_masks.get(item_type, np.zeros(len(self.items), dtype=bool))
+
+    def query_vector(self, symptom):
+        """单个症状展开为 {词项编号: 权重}，同义词按 SYNONYM_WEIGHT 折减"""
+        key = normalize_key(symptom)
+        vector = {}
+        expansions = [(key, 1.0)] + [(alt, SYNONYM_WEIGHT) for alt in self.synonyms.get(key, [])]
+        for term, scale in expansions:
+            for feature, weight in term_features(term).items():
+                term_id = self.term_ids.get(feature)
+                if term_id is not None:
+                    vector[term_id] = max(vector.get(term_id, 0), weight * scale)
+        return vector
+
+    def scores(self, symptoms):
+        """
+        返回 (症状数 × 条目数) 的得分矩阵
+        所有症状的查询列拼接后一次 bincount 完成稀疏矩阵-向量乘法
+        """
+        n = len(self.items)
+        targets, weights = [], []
+        for s, symptom in enumerate(symptoms):
+            for term_id, weight in self.query_vector(symptom).items():
+                start, end = self.indptr[term_id], self.indptr[term_id + 1]
+                targets.append(self.indices[start:end] + s * n)
+                weights.append(self.data[start:end] * weight)
+        if not targets:
+            return np.zeros((len(symptoms), n), dtype=np.float64)
+        flat = np.bincount(np.concatenate(targets), weights=np.concatenate(weights),
+                           minlength=len(symptoms) * n)
+        return flat.reshape(len(symptoms), n)
+
+    def search(self, query, limit=10, item_type=None):
+        """多症状查询（空格或逗号分隔），按命中症状数、总分降序返回"""
+        symptoms = [s for s in TERM_SPLIT.split(normalize_text(query)) if s]
+        if not symptoms:
+            return []
+        matrix = self.scores(symptoms)
+        total = matrix.sum(axis=0)
+        candidates = np.flatnonzero(total)
+        if item_type:
+            candidates = candidates[self.type_mask(item_type)[candidates]]
+        if not len(candidates):
+            return []
+        # 命中症状数优先，总分缩放到 [0, 1) 作为次序，合成一个排序键后只对前 limit 名排序
+        matched = (matrix[:, candidates] > 0).sum(axis=0)
+        rank_key = matched + total[candidates] / (total[candidates].max() + 1)
+        if len(candidates) > limit:
+            top = np.argpartition(-rank_key, limit - 1)[:limit]
+            candidates, matched, rank_key = candidates[top], matched[top], rank_key[top]
+        order = sorted(range(len(candidates)), key=lambda j: (-rank_key[j], candidates[j]))
+        results = []
+        for j in order:
+            i = candidates[j]
+            results.append({**self.items[i], 'score': round(float(total[i]), 4), 'matched': int(matched[j]),
+                            'symptoms': [symptoms[s] for s in range(len(symptoms)) if matrix[s, i] > 0]})
+        return results
+
+
+def collect_documents(ingredients_file='ingredients_master.csv', recipes_file='recipes_master.csv'):
+    documents = []
+    seen = set()
+    for kind, table, name_field, field_weights in (
+        ('ingredient', load_ingredients(ingredients_file), 'name_zh', INGREDIENT_FIELD_WEIGHTS),
+        ('recipe', load_recipes(recipes_file), 'title_zh', RECIPE_FIELD_WEIGHTS),
+    ):
+        for record in table:
+            name = getattr(record, name_field)
+            if (kind, name) in seen:
+                continue
+            seen.add((kind, name))
+            counts = Counter()
+            for field, field_weight in field_weights.items():
+                for term in split_terms(getattr(record, field)):
+                    for feature, weight in term_features(term).items():
+                        counts[feature] += weight * field_weight
+            if counts:
+                documents.append(({'name': name, 'type': kind}, dict(counts)))
+    return documents
+
+
+def build_symptom_index(output_file=INDEX_FILE, search_boosts_file=SEARCH_BOOSTS_FILE):
+    documents = collect_documents()
+    index = SymptomIndex.build(documents, load_synonyms(search_boosts_file))
+    index.save(output_file)
+    print(f"条目: {len(index.items)}，词项: {len(index.vocabulary)}，非零元素: {len(index.data)}")
+    print(f"索引已保存到: {output_file}")
+    return index
+
+
+if __name__ == "__main__":
+    print("开始构建症状检索索引...")
+    print("=" * 50)
+    index = build_symptom_index()
+
+    queries = sys.argv[1:] or ['失眠', '便秘', '咳嗽 咽痛', '食欲不振 乏力']
+    print("\n查询示例:")
+    for query in queries:
+        start = time.perf_counter()
+        results = index.search(query, limit=5)
+        elapsed = (time.perf_counter() - start) * 1000
+        names = ', '.join(f"{r['name']}({r['matched']}/{r['score']:.2f})" for r in results)
+        print(f"  {query} [{elapsed:.2f} 毫秒]: {names or '无匹配'}")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在真实 CSV 上比对图表立方体与前端：用 node 加载 config.js、utils.js、dataManager.js、searchEngine.js，
+按 searchEngine.search 的类型过滤和 applyFilters 筛选后，用 dataManager.buildStatistics 统计结果列表，
+与 slice_cube 的切片逐一比较
+两边使用同一份 read_csv_dicts 读出的行（已去掉拼接残留的标题行），比对的是取值整理、计数和筛选规则
+"""
+
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from build_chart_cube import CHART_TARGETS, FILTER_DIMENSIONS, build_cube, item_dimension_values, slice_cube  # noqa: E402
+from data_model import read_csv_dicts  # noqa: E402
+
+# index.html 筛选下拉框中的取值，其中 "甜" 在数据中不存在
+UI_OPTIONS = {
+    'constitutions': ['气虚', '阳虚', '阴虚', '痰湿', '湿热', '血虚', '气郁', '血瘀', '平和'],
+    'seasons': ['春', '夏', '秋', '冬', '四季'],
+    'four_qi': ['寒', '凉', '平', '温', '热'],
+    'five_flavors': ['酸', '甜', '苦', '辛', '咸'],
+}
+
+NODE_SCRIPT = r"""
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const input = JSON.parse(fs.readFileSync(0, 'utf-8'));
+const context = vm.createContext({
+    console: { log() {}, warn() {}, error() {} },
+    performance,
+    window: { location: { hostname: 'test', protocol: 'http:' } },
+    document: {},
+    Fuse: class { constructor(docs) { this._docs = docs; } },
+});
+for (const file of ['config.js', 'utils.js', 'dataManager.js', 'searchEngine.js']) {
+    vm.runInContext(fs.readFileSync(path.join(input.root, 'assets', 'js', file), 'utf-8'), context);
+}
+const { DataManager, SearchEngine } = context.window;
+
+const trim = rows => rows.map(row => Object.fromEntries(
+    Object.entries(row).map(([key, value]) => [key.trim(), value ? value.trim() : ''])));
+const dm = new DataManager();
+dm.ingredients = dm.processIngredients(trim(input.ingredients));
+dm.recipes = dm.processRecipes(trim(input.recipes));
+dm.recipeToIngredients = new Map();
+const engine = Object.create(SearchEngine.prototype);
+engine.dataManager = dm;
+engine.buildSearchIndex();
+const docs = engine.fuseEngine._docs;
+
+const STATS = { gate_category: 'categories', four_qi: 'qi', five_flavors: 'flavors',
+                constitutions: 'constitutions', seasons: 'seasons' };
+const PARAMS = { gate_category: 'category', subcategory: 'subcategory', four_qi: 'qi',
+                 five_flavors: 'flavor', constitutions: 'constitution', seasons: 'season' };
+const KINDS = { '食材': 'ingredient', '配方': 'recipe' };
+
+const output = input.queries.map(([target, filters]) => {
+    let results = docs;
+    const params = {};
+    for (const [dim, value] of Object.entries(filters)) {
+        if (dim === 'kind') {
+            results = results.filter(item => item.type === KINDS[value]);
+        } else {
+            params[PARAMS[dim]] = value;
+        }
+    }
+    results = engine.applyFilters(results, params);
+    const stats = new DataManager();
+    stats.ingredients = results.filter(item => item.type === 'ingredient').map(item => item.data);
+    stats.recipes = results.filter(item => item.type === 'recipe').map(item => item.data);
+    stats.buildStatistics();
+    return stats.stats[STATS[target]];
+});
+process.stdout.write(JSON.stringify(output));
+"""
+
+
+def filter_values(cube):
+    values = {dim: list(cube['dimensions'][dim]) for dim in FILTER_DIMENSIONS}
+    for dim, options in UI_OPTIONS.items():
+        values[dim] += [option for option in options if option not in values[dim]]
+    return values
+
+
+@unittest.skipUnless(shutil.which('node'), '需要 node')
+class ChartCubeMatchesFrontendTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ingredients = read_csv_dicts(os.path.join(ROOT, 'ingredients_master.csv'))
+        cls.recipes = read_csv_dicts(os.path.join(ROOT, 'recipes_master.csv'))
+        cls.cube = build_cube(item_dimension_values(cls.ingredients, cls.recipes))
+
+    def frontend_counts(self, queries):
+        payload = json.dumps({'root': ROOT, 'ingredients': self.ingredients, 'recipes': self.recipes,
+                              'queries': queries}, ensure_ascii=False)
+        output = subprocess.run(['node', '-e', NODE_SCRIPT], input=payload.encode('utf-8'),
+                                capture_output=True, check=True).stdout
+        return json.loads(output)
+
+    def assert_slices_match(self, queries):
+        for (target, filters), expected in zip(queries, self.frontend_counts(queries)):
+            with self.subTest(target=target, filters=filters):
+                self.assertEqual(slice_cube(self.cube, target, filters), expected)
+
+    def test_unfiltered_charts_match_statistics(self):
+        self.assert_slices_match([[target, {}] for target in CHART_TARGETS])
+
+    def test_single_filter(self):
+        values = filter_values(self.cube)
+        self.assert_slices_match([[target, {dim: value}] for target in CHART_TARGETS
+                                  for dim in FILTER_DIMENSIONS for value in values[dim]])
+
+    def test_two_filters(self):
+        values = filter_values(self.cube)
+        # 子类取值很多，两两组合时只取前 10 个
+        values['subcategory'] = values['subcategory'][:10]
+        queries = [[target, {dim_a: a, dim_b: b}] for target in CHART_TARGETS
+                   for dim_a, dim_b in itertools.combinations(FILTER_DIMENSIONS, 2)
+                   for a in values[dim_a] for b in values[dim_b]]
+        self.assert_slices_match(queries)
+
+    def test_exact_qi_and_substring_season(self):
+        # 四气按整值匹配，"微温"、"温、寒" 不算温性；季节按包含匹配，"夏秋"、"春夏" 的菜谱也算夏季
+        self.assertEqual(slice_cube(self.cube, 'four_qi', {'four_qi': '温'}), {'温': 124})
+        self.assertEqual(slice_cube(self.cube, 'seasons', {'kind': '配方', 'seasons': '夏'}),
+                         {'夏': 22, '夏秋': 3, '春夏': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中文文本归一化
+名称和标签中全角/半角标点混用（；与 ;、（与 (），供应商资料还会带繁体字和异体字，
+直接按字符串比较会漏掉重复。这里在导入时一次性预编译 str.translate 转换表：
+- 全角转半角：U+FF01–FF5E 映射到 ASCII，全角空格映射为普通空格
+- 繁体转简体：手工整理的食材、药材、功效常用字
+- 异体字：常见异体写法，以及 CJK 兼容汉字（U+F900–FAFF）映射到标准汉字
+三张表合并为一张，每个字符串只需一次 translate，不必在每个使用方重复做正则或 unicodedata 处理
+"""
+
+import re
+import unicodedata
+
+# 全角字符及全角空格
+WIDTH_TABLE = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+WIDTH_TABLE[0x3000] = ord(' ')
+
+# 零宽字符、BOM 直接删除
+INVISIBLE_TABLE = {0x200B: None, 0x200C: None, 0x200D: None, 0x2060: None, 0xFEFF: None}
+
+TRADITIONAL = (
+    '薑棗蔥參當歸貝黃蓮雞魚豬鴨鵝蝦蠔龜鱉藥葉麥穀蘿蔔蘆筍銀圓龍蓯澤瀉陳紅綠藍薺蘋檸楊櫻蘇窩蟲靈'
+    '實華雜鮮醬鹽湯飲膠決麩蕎懷廣東萵莧馬鈴齒莖鬚頭腦腎臟腸膽經氣溫熱涼鹹澀補養潤濕虛陰陽風腫'
+    '蠣鰻鯽鯉鱸鱔鰱鴿鵪鶉麵餅葷蒼術蘊髮膚瘡癢瘧瘻療癒歲時節蕪茲厲學黨邊豐產麗壯嬰婦兒孫'
+    '屬絲線綿縮緊蠶繭蝕螢蟬蠍蟶蠔鯧鯊鱈鮭鯛鰹鰍鱅鵲鷄鳥鳳鳩鴉鷓鴣鵰鷹鵬騾驢駱駝獼'
+    '茲蔞薈莢萊蕁葒蓽蘚蘭蘊薌薔藺蘄蕘蕓灑燉燜燒煉爐燈營養濃漿滷'
+)
+SIMPLIFIED = (
+    '姜枣葱参当归贝黄莲鸡鱼猪鸭鹅虾蚝龟鳖药叶麦谷萝卜芦笋银圆龙苁泽泻陈红绿蓝荠苹柠杨樱苏窝虫灵'
+    '实华杂鲜酱盐汤饮胶决麸荞怀广东莴苋马铃齿茎须头脑肾脏肠胆经气温热凉咸涩补养润湿虚阴阳风肿'
+    '蛎鳗鲫鲤鲈鳝鲢鸽鹌鹑面饼荤苍术蕴发肤疮痒疟瘘疗愈岁时节芜兹厉学党边丰产丽壮婴妇儿孙'
+    '属丝线绵缩紧蚕茧蚀萤蝉蝎蛏蚝鲳鲨鳕鲑鲷鲣鳅鳙鹊鸡鸟凤鸠鸦鹧鸪雕鹰鹏骡驴骆驼猕'
+    '兹蒌荟荚莱荨荭荜藓兰蕴芗蔷蔺蕲荛芸洒炖焖烧炼炉灯营养浓浆卤'
+)
+
+# 异体字 -> 通行写法
+VARIANTS = {
+    '荳': '豆', '蔴': '麻', '麪': '面', '秔': '粳', '稉': '粳', '菓': '果', '糉': '粽',
+    '蕋': '蕊', '綫': '线', '鷄': '鸡', '雞': '鸡', '鴈': '雁', '鵞': '鹅', '峯': '峰',
+    '淸': '清', '靑': '青', '爲': '为', '裏': '里', '汚': '污', '滙': '汇',
+    '籐': '藤', '搾': '榨', '糡': '浆', '煑': '煮', '粃': '秕', '甞': '尝', '嚐': '尝',
+    '菸': '烟', '麯': '曲', '麴': '曲', '餻': '糕', '粦': '磷',
+}
+
+
+def _build_variant_table():
+    table = {ord(src): dst for src, dst in VARIANTS.items() if src != dst}
+    # CJK 兼容汉字有规范分解，导入时展开一次
+    for code in range(0xF900, 0xFB00):
+        decomposition = unicodedata.normalize('NFC', chr(code))
+        if decomposition != chr(code) and len(decomposition) == 1:
+            table[code] = decomposition
+    return table
+
+
+def _compose(*tables):
+    """把多张单字符映射合并为一张：先按第一张转换，结果再依次经过后面的表"""
+    combined = {}
+    for table in tables:
+        for code in table:
+            combined.setdefault(code, chr(code))
+    for code in list(combined):
+        text = chr(code)
+        for table in tables:
+            text = text.translate(table)
+        combined[code] = text if text else None
+    return {code: value for code, value in combined.items() if value != chr(code)}
+
+
+TRAD_TABLE = str.maketrans(TRADITIONAL, SIMPLIFIED)
+VARIANT_TABLE = _build_variant_table()
+FOLD_TABLE = _compose(INVISIBLE_TABLE, WIDTH_TABLE, VARIANT_TABLE, TRAD_TABLE)
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def fold_width(text):
+    """全角转半角"""
+    return text.translate(WIDTH_TABLE)
+
+
+def to_simplified(text):
+    """繁体字和异体字转为简体通行写法"""
+    return text.translate(VARIANT_TABLE).translate(TRAD_TABLE)
+
+
+def normalize_text(text):
+    """用于展示和拆分的归一化：字符折叠，空白合并，首尾去空"""
+    return WHITESPACE.sub(' ', text.translate(FOLD_TABLE)).strip()
+
+
+def normalize_key(text):
+    """用于去重、关联和检索的键：字符折叠后去掉所有空白并忽略大小写"""
+    return WHITESPACE.sub('', text.translate(FOLD_TABLE)).casefold()
+
+
+if __name__ == "__main__":
+    samples = ['米仁（薏苡仁）', '當歸黃芪雞湯', 'ＸＯ醬', '川貝母；枇杷葉', ' 紅棗 ', '蔴油', '鷄蛋']
+    print(f"折叠表共 {len(FOLD_TABLE)} 个字符")
+    for sample in samples:
+        print(f"{sample!r:>16} -> {normalize_text(sample)!r:<16} 键: {normalize_key(sample)!r}")